@@ -0,0 +1,63 @@
+"""
+Compares the byte-level decoding of Facebook's JSON to the recursive one.
+
+Usage: python -m benchmarks.bench_decoding [number_of_messages]
+"""
+import json
+import sys
+import timeit
+
+from miner.utils import utils
+
+WORDS = ["Tőke", "Hal", "szép", "időnk", "van", "ma", ":D", "yapp", "ünnep"]
+
+
+def to_facebook_encoding(string: str) -> str:
+    return string.encode("utf-8").decode("latin-1")
+
+
+def get_raw_thread(number_of_messages: int) -> bytes:
+    messages = []
+    for i in range(number_of_messages):
+        content = " ".join(WORDS[j % len(WORDS)] for j in range(i % 12 + 1))
+        messages.append(
+            {
+                "sender_name": to_facebook_encoding(WORDS[i % 3]),
+                "timestamp_ms": 1_500_000_000_000 + i * 1000,
+                "content": to_facebook_encoding(content),
+                "type": "Generic",
+            }
+        )
+    thread = {
+        "participants": [{"name": to_facebook_encoding("Tőke Hal")}],
+        "messages": messages,
+        "title": to_facebook_encoding("Tőke Hal"),
+    }
+    return json.dumps(thread).encode("ascii")
+
+
+def recursive(raw: bytes) -> dict:
+    return utils.decode_data(json.loads(raw), utils.utf8_decoder)
+
+
+def byte_level(raw: bytes) -> dict:
+    return utils.loads_facebook_json(raw)
+
+
+def main(number_of_messages: int = 200_000) -> None:
+    raw = get_raw_thread(number_of_messages)
+    assert recursive(raw) == byte_level(raw)
+
+    print(f"{number_of_messages:,} messages, {len(raw) / 2 ** 20:.1f} MiB")
+    for func in (recursive, byte_level):
+        # NOTE: garbage collection is on, as it would be in a real run
+        best = min(
+            timeit.repeat(
+                lambda: func(raw), setup="gc.enable()", number=1, repeat=5
+            )
+        )
+        print(f"{func.__name__:>12}: {best:.3f}s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+"""
+Compares StatsDataframe to the former per-message Python implementation.
+
+Usage: python -m benchmarks.bench_stats [number_of_messages]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from miner.message.conversation_stats import StatsDataframe
+
+WORDS = np.array(["Tőke", "Hal", "szép", "időnk", "van", "ma", ":D", "yapp"])
+
+
+def get_messages(number_of_messages: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    content = pd.Series(
+        [
+            " ".join(WORDS[rng.integers(0, len(WORDS), length)])
+            for length in rng.integers(0, 15, number_of_messages)
+        ],
+        dtype=object,
+    )
+    # roughly every tenth message is a media message
+    content[rng.random(number_of_messages) < 0.1] = np.nan
+    index = pd.date_range("2010", periods=number_of_messages, freq="s")
+    return pd.DataFrame({"content": content.values}, index=index)
+
+
+def per_message(df: pd.DataFrame) -> pd.DataFrame:
+    def is_nan(content):
+        return not isinstance(content, str)
+
+    stats = pd.DataFrame(index=df.index)
+    stats["mc"] = [1 for _ in range(len(df))]
+    stats["text_mc"] = df.content.map(lambda c: 0 if is_nan(c) else 1).values
+    stats["media_mc"] = df.content.map(lambda c: 1 if is_nan(c) else 0).values
+    stats["wc"] = df.content.map(
+        lambda c: 0 if is_nan(c) else len(c.split())
+    ).values
+    stats["cc"] = df.content.map(
+        lambda c: 0 if is_nan(c) else sum([len(w) for w in c.split()])
+    ).values
+    return stats
+
+
+def vectorized(df: pd.DataFrame) -> pd.DataFrame:
+    return StatsDataframe()(df)
+
+
+def main(number_of_messages: int = 5_000_000) -> None:
+    df = get_messages(number_of_messages)
+    print(f"{number_of_messages:,} messages")
+
+    results = []
+    for func in (per_message, vectorized):
+        start = time.perf_counter()
+        results.append(func(df))
+        print(f"{func.__name__:>12}: {time.perf_counter() - start:.3f}s")
+
+    pd.testing.assert_frame_equal(*results, check_dtype=False)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
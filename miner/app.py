@@ -1,13 +1,15 @@
 import logging
 import os
-from typing import Dict, Union
+from typing import Any, Dict, Union
 
 from miner.friends import Friends
 from miner.message.conversations import Conversations
+from miner.message.language_detector import LanguageDetector
+from miner.message.message_store import MessageStore
 from miner.message.messaging_analyzer import MessagingAnalyzerManager
 from miner.people import People
 from miner.profile_information import ProfileInformation
-from miner.utils import const, utils
+from miner.utils import const, filesystem, utils
 
 
 class App:
@@ -15,46 +17,76 @@ class App:
     Entrypoint for miner package.
     """
 
-    def __init__(self, path: Union[str, None] = None):
-        if not path:
-            config = utils.read_yaml(
-                os.path.join(
-                    f"{os.path.dirname(os.path.dirname(__file__))}",
-                    "configuration.yml",
-                )
+    def __init__(
+        self,
+        path: Union[str, None] = None,
+        timezone: Union[str, None] = None,
+        message_store: bool = False,
+        workers: Union[int, None] = None,
+    ):
+        """
+
+        @param path: path of the export, a directory or a .zip.
+        @param timezone: time zone of the analyses, e.g. `Europe/Budapest`,
+        hours and weekdays of the messages are counted in it.
+        @param message_store: whether to ingest the messages into a database
+        next to the export, which then answers the counts and time series.
+        @param workers: number of processes for loading the threads
+        and for detecting the languages of the messages.
+        """
+        general = utils.read_yaml(
+            os.path.join(
+                f"{os.path.dirname(os.path.dirname(__file__))}",
+                "configuration.yml",
             )
-            path = config.get("general").get("DATA_PATH")
+        ).get("general")
+        path = path or general.get("DATA_PATH")
+        timezone = timezone or general.get("TIMEZONE")
+        workers = workers or general.get("WORKERS")
 
         self._path = utils.unzip(path)
+        self._timezone: str = timezone or const.DEFAULT_TIMEZONE
+        self._message_store: bool = message_store
+        self._workers: Union[int, None] = workers
 
         self._configure_logger()
         self._config = self._build_config()
 
         logging.info("The app has been initialized...")
 
-        self._friends = self._get_friends()
-        self._conversations = self._get_conversations()
-        self._analyzer = self._get_analyzer()
-        self._people = self._get_people()
+        # NOTE: components are built on first access, so commands
+        # only pay for the data they actually touch
+        self._friends: Union[Friends, None] = None
+        self._conversations: Union[Conversations, None] = None
+        self._analyzer: Union[MessagingAnalyzerManager, None] = None
+        self._people: Union[People, None] = None
 
     @property
     def friends(self) -> Friends:
+        if self._friends is None:
+            self._friends = self._get_friends()
         return self._friends
 
     @property
     def conversations(self) -> Conversations:
+        if self._conversations is None:
+            self._conversations = self._get_conversations()
         return self._conversations
 
     @property
     def analyzer(self) -> MessagingAnalyzerManager:
+        if self._analyzer is None:
+            self._analyzer = self._get_analyzer()
         return self._analyzer
 
     @property
     def people(self) -> People:
+        if self._people is None:
+            self._people = self._get_people()
         return self._people
 
     @property
-    def config(self) -> Dict[str, ProfileInformation]:
+    def config(self) -> Dict[str, Any]:
         return self._config
 
     @property
@@ -65,16 +97,44 @@ class App:
         return Friends(os.path.join(f"{self._path}", *const.FRIENDS_PATH))
 
     def _get_conversations(self) -> Conversations:
-        return Conversations(self._path)
+        return Conversations(self._path, workers=self._workers)
 
     def _get_analyzer(self) -> MessagingAnalyzerManager:
-        return MessagingAnalyzerManager(self._conversations, self._config)
+        conversations = self.conversations
+        # NOTE: the store is only built when the messages are analyzed,
+        # after the conversations, so their cache is ingested
+        if self._message_store and "message_store" not in self._config:
+            self._config["message_store"] = self._get_message_store(
+                self._config
+            )
+        return MessagingAnalyzerManager(conversations, self._config)
 
     def _get_people(self) -> People:
-        return People(friends=self._friends, conversations=self._conversations)
-
-    def _build_config(self) -> Dict[str, ProfileInformation]:
-        return {"profile": self.profile_information}
+        return People(friends=self.friends, conversations=self.conversations)
+
+    def _build_config(self) -> Dict[str, Any]:
+        config = {
+            "profile": self.profile_information,
+            "timezone": self._timezone,
+            "language_detector": LanguageDetector(
+                cache_path=filesystem.get_writable_path(
+                    os.path.join(
+                        self._path, *const.CACHE_SUBPATH, "languages.jsonl"
+                    )
+                ),
+                workers=self._workers,
+            ),
+        }
+        return config
+
+    def _get_message_store(self, config: Dict[str, Any]) -> MessageStore:
+        cache_path = filesystem.get_writable_path(
+            os.path.join(self._path, *const.CACHE_SUBPATH)
+        )
+        os.makedirs(cache_path, exist_ok=True)
+        return MessageStore.from_path(
+            os.path.join(cache_path, "messages.sqlite"), self._path, config
+        )
 
     @staticmethod
     def _configure_logger() -> None:
@@ -1,4 +1,5 @@
-from typing import Any, Callable, Dict, List, NamedTuple, Union
+from collections import namedtuple
+from typing import Any, Callable, Dict, List, NamedTuple, Type, Union, cast
 
 import pandas as pd
 
@@ -25,6 +26,23 @@ class FacebookData:
         self._metadata: NamedTuple
         self._data: pd.DataFrame = self._get_data()
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # NOTE: metadata is a dynamically created namedtuple,
+        # so it has to be pickled as a dict, e.g. for multiprocessing
+        state = self.__dict__.copy()
+        if "_metadata" in state:
+            state["_metadata"] = state["_metadata"]._asdict()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        if "_metadata" in state:
+            _metadata = state["_metadata"]
+            metadata = cast(
+                Type[NamedTuple], namedtuple("metadata", list(_metadata))
+            )
+            state["_metadata"] = metadata._make(_metadata.values())
+        self.__dict__.update(state)
+
     @property
     def data(self) -> pd.DataFrame:
         return self._data
@@ -39,7 +57,9 @@ class FacebookData:
 
     @property
     def reader(self) -> Callable:
-        return utils.read_json if self._reader is None else self._reader
+        return (
+            utils.read_facebook_json if self._reader is None else self._reader
+        )
 
     def _register_processors(
         self, preprocessor: command.CommandChainCreator
@@ -82,7 +102,11 @@ class FacebookData:
         return pd.DataFrame(data, **kwargs)
 
     @staticmethod
-    def _set_date_as_index(data: pd.DataFrame, column: str) -> pd.DataFrame:
-        date_series = data[column].apply(utils.ts_to_date)
+    def _set_date_as_index(
+        data: pd.DataFrame, column: str, unit: str = "s"
+    ) -> pd.DataFrame:
+        # NOTE: dates are stored in UTC,
+        # analyses convert them to their own time zone
+        date_index = utils.ts_to_datetime_index(data[column], unit=unit)
         data = data.drop(columns=[column])
-        return data.set_index(date_series).iloc[::-1]
+        return data.set_index(date_index).iloc[::-1]
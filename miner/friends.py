@@ -51,7 +51,6 @@ class Friends(FacebookData):
     def _register_processors(
         self, preprocessor: command.CommandChainCreator
     ) -> command.CommandChainCreator:
-        preprocessor.register_command(utils.decode_data, utils.utf8_decoder)
         preprocessor.register_command(self._set_metadata)
         preprocessor.register_command(
             self._get_dataframe, field="friends", columns=["name", "timestamp"]
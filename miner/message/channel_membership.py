@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from miner.message.conversation import Conversation
+
+
+class ChannelMembership:
+    """
+    Class for the sparse incidence matrix of participants and channels.
+    Only the (participant, channel) pairs are stored, sorted both ways,
+    so the channels of a participant and the participants of a channel
+    are contiguous slices, and queries are answered with array lookups.
+    """
+
+    def __init__(
+        self,
+        participants: np.ndarray,
+        channels: np.ndarray,
+        rows: np.ndarray,
+        cols: np.ndarray,
+    ) -> None:
+        """
+
+        @param participants: sorted names of the participants.
+        @param channels: names of the channels.
+        @param rows: participant ID of every pair, i.e. its position.
+        @param cols: channel ID of every pair.
+        """
+        self._participants: np.ndarray = participants
+        self._channels: np.ndarray = channels
+        self._participant_index: pd.Index = pd.Index(participants)
+        self._channel_index: pd.Index = pd.Index(channels)
+
+        # duplicates are dropped, and pairs are sorted by participant
+        keys = np.unique(
+            rows.astype(np.int64) * len(channels) + cols.astype(np.int64)
+        )
+        self._rows: np.ndarray = keys // max(len(channels), 1)
+        self._cols: np.ndarray = keys % max(len(channels), 1)
+        self._row_ptr: np.ndarray = np.searchsorted(
+            self._rows, np.arange(len(participants) + 1)
+        )
+        # the same pairs sorted by channel
+        by_channel = np.argsort(self._cols, kind="mergesort")
+        self._col_rows: np.ndarray = self._rows[by_channel]
+        self._col_ptr: np.ndarray = np.searchsorted(
+            self._cols[by_channel], np.arange(len(channels) + 1)
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ChannelMembership of {len(self._participants)} participants "
+            f"in {len(self._channels)} channels>"
+        )
+
+    @classmethod
+    def from_conversations(
+        cls, data: Dict[str, Conversation]
+    ) -> ChannelMembership:
+        """
+
+        @param data: channel to convo map.
+        @return: membership of every participant of the conversations.
+        """
+        channels = np.array(list(data.keys()), dtype=object)
+        participants_per_channel = [
+            convo.metadata.participants for convo in data.values()
+        ]
+        names = np.array(
+            [name for names in participants_per_channel for name in names],
+            dtype=object,
+        )
+        rows, participants = pd.factorize(names, sort=True)
+        cols = np.repeat(
+            np.arange(len(channels)),
+            [len(names) for names in participants_per_channel],
+        )
+        return cls(
+            np.asarray(participants, dtype=object), channels, rows, cols
+        )
+
+    @property
+    def shape(self):
+        return len(self._participants), len(self._channels)
+
+    @property
+    def participants(self) -> List[str]:
+        return self._participants.tolist()
+
+    @property
+    def channels(self) -> List[str]:
+        return self._channels.tolist()
+
+    def get_channels(self, name: str) -> List[str]:
+        """
+
+        @param name: name of a participant.
+        @return: all the channels the participant is in.
+        """
+        row = self._participant_index.get_indexer([name])[0]
+        if row == -1:
+            return []
+        cols = self._cols[self._row_ptr[row] : self._row_ptr[row + 1]]
+        return self._channels[cols].tolist()
+
+    def get_participants(self, channel: str) -> List[str]:
+        """
+
+        @param channel: name of a channel.
+        @return: all the participants of the channel.
+        """
+        col = self._channel_index.get_indexer([channel])[0]
+        if col == -1:
+            return []
+        rows = self._col_rows[self._col_ptr[col] : self._col_ptr[col + 1]]
+        return self._participants[rows].tolist()
+
+    def get_channels_of_any(self, names: List[str]) -> List[str]:
+        """
+
+        @param names: names of participants.
+        @return: channels with at least one of the participants,
+        in the order of the channels.
+        """
+        rows = self._participant_index.get_indexer(names)
+        mask = np.isin(self._rows, rows[rows != -1])
+        return self._channels[np.unique(self._cols[mask])].tolist()
+
+    def get_co_members(self, name: str) -> List[str]:
+        """
+
+        @param name: name of a participant.
+        @return: everyone who is in at least one channel with the participant.
+        """
+        cols = self._channel_index.get_indexer(self.get_channels(name))
+        rows = np.unique(self._rows[np.isin(self._cols, cols)])
+        return [p for p in self._participants[rows].tolist() if p != name]
+
+    def is_member(self, name: str, channel: str) -> bool:
+        row = self._participant_index.get_indexer([name])[0]
+        col = self._channel_index.get_indexer([channel])[0]
+        if row == -1 or col == -1:
+            return False
+        cols = self._cols[self._row_ptr[row] : self._row_ptr[row + 1]]
+        index = np.searchsorted(cols, col)
+        return bool(index < len(cols) and cols[index] == col)
+
+    def get_channel_sizes(self) -> Dict[str, int]:
+        """
+
+        @return: number of participants in every channel.
+        """
+        return dict(zip(self.channels, np.diff(self._col_ptr).tolist()))
+
+    def subset(self, channels: List[str]) -> ChannelMembership:
+        """
+
+        @param channels: names of channels, e.g. after filtering.
+        @return: membership within only these channels.
+        """
+        cols = self._channel_index.get_indexer(channels)
+        cols = cols[cols != -1]
+        remap = np.full(len(self._channels), -1)
+        remap[cols] = np.arange(len(cols))
+        mask = np.isin(self._cols, cols)
+        kept = np.unique(self._rows[mask])
+        return ChannelMembership(
+            self._participants[kept],
+            self._channels[cols],
+            np.searchsorted(kept, self._rows[mask]),
+            remap[self._cols[mask]],
+        )
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """
+
+        @return: map for every participant to any channels they are in.
+        """
+        return {
+            name: self._channels[
+                self._cols[self._row_ptr[row] : self._row_ptr[row + 1]]
+            ].tolist()
+            for row, name in enumerate(self.participants)
+        }
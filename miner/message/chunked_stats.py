@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import reduce
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from miner.message.conversation_stats import ConversationStats
+from miner.message.conversations import Conversations
+from miner.utils import const
+
+
+@dataclass
+class StatsSummary:
+    """
+    Class for holding the mergeable statistics of a chunk of messages.
+    Summaries of any chunks can be added in any grouping,
+    so the messages never have to be in memory at once.
+    The most used messages are counted with a Misra-Gries summary of at most
+    `max_msgs` entries, and the number of distinct messages is estimated
+    from the `max_msgs` smallest hashes of them (a k minimum values sketch),
+    so they don't grow with the whole corpus either.
+    """
+
+    sums: pd.Series = field(
+        default_factory=lambda: pd.Series(0, index=const.STAT_COLUMNS)
+    )
+    start: Union[pd.Timestamp, None] = None
+    end: Union[pd.Timestamp, None] = None
+    channels: Set[str] = field(default_factory=set)
+    contributors: Set[str] = field(default_factory=set)
+    words: Counter = field(default_factory=Counter)
+    msgs: Counter = field(default_factory=Counter)
+    msg_hashes: np.ndarray = field(
+        default_factory=lambda: np.array([], dtype=np.uint64)
+    )
+    max_msgs: Union[int, None] = const.CHUNKED_MAX_MSGS
+
+    @classmethod
+    def from_df(
+        cls,
+        df: pd.DataFrame,
+        config: Dict[str, Any],
+        max_msgs: Union[int, None] = const.CHUNKED_MAX_MSGS,
+    ) -> StatsSummary:
+        """
+
+        @param df: a chunk of messages, e.g. a conversation.
+        @param config: app config, passed to ConversationStats.
+        @param max_msgs: number of distinct messages kept, all if None.
+        @return: the summary of the chunk.
+        """
+        if not len(df):
+            return cls(max_msgs=max_msgs)
+        stats = ConversationStats(df, config)
+        text = stats.text
+        return cls(
+            sums=pd.Series(
+                {col: getattr(stats, col) for col in const.STAT_COLUMNS}
+            ),
+            start=stats.start,
+            end=stats.end,
+            channels=set(stats.channels),
+            contributors=set(stats.contributors),
+            words=Counter(stats.word_counts.counts),
+            msgs=cls._prune(Counter(text.value_counts().to_dict()), max_msgs),
+            msg_hashes=cls._keep_smallest(
+                np.unique(pd.util.hash_pandas_object(text, index=False)),
+                max_msgs,
+            ),
+            max_msgs=max_msgs,
+        )
+
+    def __add__(self, other: StatsSummary) -> StatsSummary:
+        max_msgs = self._pick(min, self.max_msgs, other.max_msgs)
+        return StatsSummary(
+            sums=self.sums + other.sums,
+            start=self._pick(min, self.start, other.start),
+            end=self._pick(max, self.end, other.end),
+            channels=self.channels | other.channels,
+            contributors=self.contributors | other.contributors,
+            words=self.words + other.words,
+            msgs=self._prune(self.msgs + other.msgs, max_msgs),
+            msg_hashes=self._keep_smallest(
+                np.union1d(self.msg_hashes, other.msg_hashes), max_msgs
+            ),
+            max_msgs=max_msgs,
+        )
+
+    @staticmethod
+    def _prune(counter: Counter, max_msgs: Union[int, None]) -> Counter:
+        # NOTE: merging Misra-Gries summaries, counts are decreased by the
+        # (k+1)-th largest one, so at most k are left, and frequent messages
+        # are underestimated by at most (number of messages) / (k+1)
+        if max_msgs is None or len(counter) <= max_msgs:
+            return counter
+        threshold = sorted(counter.values(), reverse=True)[max_msgs]
+        return Counter(
+            {
+                msg: count - threshold
+                for msg, count in counter.items()
+                if count > threshold
+            }
+        )
+
+    @staticmethod
+    def _keep_smallest(
+        hashes: np.ndarray, max_msgs: Union[int, None]
+    ) -> np.ndarray:
+        # NOTE: hashes are sorted and distinct
+        return hashes if max_msgs is None else hashes[:max_msgs]
+
+    @staticmethod
+    def _pick(func: Callable, first: Any, second: Any) -> Any:
+        values = [value for value in (first, second) if value is not None]
+        return func(values) if values else None
+
+
+class ChunkedStats:
+    """
+    Class for analyzing exports larger than memory. Statistics are computed
+    chunk by chunk (e.g. conversation by conversation) and merged,
+    so only one chunk has to be loaded at a time.
+    """
+
+    def __init__(
+        self,
+        chunks: Callable[[], Iterable[pd.DataFrame]],
+        config: Dict[str, Any],
+        max_msgs: Union[int, None] = const.CHUNKED_MAX_MSGS,
+    ) -> None:
+        """
+
+        @param chunks: returns a new iterator of chunks on every call,
+        e.g. `ConversationCache.iter_dfs`, `MessageStore.iter_dfs`
+        or `iter_thread_dfs`.
+        @param config: app config, passed to ConversationStats.
+        @param max_msgs: number of distinct messages tracked,
+        all of them if None.
+        """
+        self._chunks = chunks
+        self._config = config
+        self._max_msgs = max_msgs
+        self._summary: Union[StatsSummary, None] = None
+
+    @classmethod
+    def from_path(
+        cls, path: str, config: Dict[str, Any], **kwargs: Any
+    ) -> ChunkedStats:
+        """
+
+        @param path: path to the export.
+        @param config: app config, passed to ConversationStats.
+        @param kwargs: passed to ChunkedStats.
+        @return: stats of the export, read thread by thread from the jsons.
+        """
+        return cls(lambda: iter_thread_dfs(path), config, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"ChunkedStats for {self.number_of_channels} channels"
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self._config
+
+    @property
+    def summary(self) -> StatsSummary:
+        if self._summary is None:
+            self._summary = reduce(
+                lambda total, df: total
+                + StatsSummary.from_df(df, self.config, self._max_msgs),
+                self._chunks(),
+                StatsSummary(max_msgs=self._max_msgs),
+            )
+        return self._summary
+
+    @property
+    def mc(self) -> int:
+        return int(self.summary.sums.mc)
+
+    @property
+    def wc(self) -> int:
+        return int(self.summary.sums.wc)
+
+    @property
+    def cc(self) -> int:
+        return int(self.summary.sums.cc)
+
+    @property
+    def text_mc(self) -> int:
+        return int(self.summary.sums.text_mc)
+
+    @property
+    def media_mc(self) -> int:
+        return int(self.summary.sums.media_mc)
+
+    @property
+    def start(self) -> Union[pd.Timestamp, None]:
+        return self.summary.start
+
+    @property
+    def end(self) -> Union[pd.Timestamp, None]:
+        return self.summary.end
+
+    @property
+    def channels(self) -> List[str]:
+        return sorted(self.summary.channels)
+
+    @property
+    def number_of_channels(self) -> int:
+        return len(self.summary.channels)
+
+    @property
+    def contributors(self) -> List[str]:
+        return sorted(self.summary.contributors)
+
+    @property
+    def approx_unique_mc(self) -> int:
+        """
+
+        @return: number of distinct messages, exact if there are
+        less than `max_msgs` of them, estimated otherwise,
+        with a relative error of about 1 / sqrt(`max_msgs`).
+        """
+        hashes, max_msgs = self.summary.msg_hashes, self.summary.max_msgs
+        if max_msgs is None or len(hashes) < max_msgs:
+            return len(hashes)
+        # NOTE: the k-th smallest of n uniform hashes is at about k / n
+        # of their range, so n is estimated as (k - 1) / (k-th / range)
+        return round((len(hashes) - 1) * 2 ** 64 / (int(hashes[-1]) + 1))
+
+    @property
+    def unique_wc(self) -> int:
+        return len(self.summary.words)
+
+    @property
+    def most_used_msgs(self) -> pd.DataFrame:
+        """
+
+        @return: most occurring messages in descending order.
+        Counts are approximate if there are more than `max_msgs`
+        distinct messages.
+        """
+        return self._counter_to_df(self.summary.msgs)
+
+    @property
+    def most_used_words(self) -> pd.DataFrame:
+        """
+
+        @return: most occurring words in descending order.
+        """
+        return self._counter_to_df(self.summary.words)
+
+    def get_grouped_time_series_data(
+        self, timeframe: str = "y"
+    ) -> pd.DataFrame:
+        """
+
+        @param timeframe: in which timeframe you want to group the messages.
+        One of {y|m|d|h}.
+        @return: numeric statistics like message, word, char, etc. count
+        grouped by datetime according the timeframe.
+        """
+        grouped = None
+        for df in self._chunks():
+            if not len(df):
+                continue
+            chunk = ConversationStats(
+                df, self.config
+            ).get_grouped_time_series_data(timeframe=timeframe)
+            grouped = (
+                chunk if grouped is None else grouped.add(chunk, fill_value=0)
+            )
+        if grouped is None:
+            return pd.DataFrame()
+        return grouped.sort_index().astype(np.int64)
+
+    @staticmethod
+    def _counter_to_df(counter: Counter) -> pd.DataFrame:
+        return pd.DataFrame(
+            counter.most_common(), columns=["unique_values", "counts"]
+        )
+
+
+def iter_thread_dfs(
+    path: str, kinds: Iterable[str] = ("private", "group")
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads the threads of an export one by one, straight from the jsons,
+    without building `Conversations`, e.g. for `ChunkedStats`.
+
+    @param path: path to the export.
+    @param kinds: private, group or both.
+    @return: iterator of the messages of every thread.
+    """
+    for kind in kinds:
+        for _, jsons in Conversations.iter_threads(path, kind):
+            yield Conversations.read_thread(jsons).data
@@ -3,11 +3,12 @@ from __future__ import annotations
 import logging
 import os
 from collections import namedtuple
-from typing import Callable, Dict, List
+from typing import Any, Callable, Dict, List
 
 import pandas as pd
 
 from miner.data import FacebookData
+from miner.message.conversation_stats import StatsDataframe
 from miner.utils import const, utils
 
 
@@ -25,18 +26,56 @@ class Conversation(FacebookData):
         super().__init__(path, reader=reader, processors=processors)
 
     def __add__(self, other: Conversation):
-        self.data = pd.concat([self.data, other.data]).sort_index()
-        return self
+        return self.merge([self, other])
+
+    @staticmethod
+    def merge(parts: List[Conversation]) -> Conversation:
+        """
+        Merges the parts of a thread, e.g. `message_1.json ... message_N.json`.
+        The messages of all the parts are concatenated and sorted only once.
+
+        @param parts: conversations of the same thread, the first one is kept.
+        @return: the first part with the messages and metadata of all.
+        """
+        convo = parts[0]
+        if len(parts) == 1:
+            return convo
+        # parts without messages (e.g. nothing new in them) are skipped
+        dfs = [part.data for part in parts if len(part.data)]
+        convo.data = utils.stack_dfs(*dfs) if dfs else convo.data
+        convo._metadata = Conversation._merge_metadata(parts)
+        return convo
+
+    @staticmethod
+    def _merge_metadata(parts: List[Conversation]):
+        # NOTE: lists (e.g. participants) are the union of all the parts,
+        # other fields are taken from the first part that has them
+        merged: Dict[str, Any] = {}
+        for part in parts:
+            for key, value in part.metadata._asdict().items():
+                current = merged.get(key)
+                if current is None:
+                    merged[key] = value
+                elif isinstance(current, list) and isinstance(value, list):
+                    merged[key] = current + [
+                        item for item in value if item not in current
+                    ]
+        metadata = namedtuple("metadata", sorted(merged))
+        return metadata(**merged)
 
     def _register_processors(self, preprocessor):
-        preprocessor.register_command(utils.decode_data, utils.utf8_decoder)
         preprocessor.register_command(self._set_metadata)
+        return self._register_message_processors(preprocessor)
+
+    def _register_message_processors(self, preprocessor):
         preprocessor.register_command(self._get_dataframe, field="messages")
         preprocessor.register_command(
-            self._set_date_as_index, column="timestamp_ms"
+            self._set_date_as_index, column="timestamp_ms", unit="ms"
         )
         preprocessor.register_command(self._add_partner_column)
         preprocessor.register_command(self._split_media_column)
+        preprocessor.register_command(self._add_stats_columns)
+        preprocessor.register_command(self._set_categorical_columns)
         return preprocessor
 
     def _set_metadata(self, data: Dict) -> Dict:
@@ -56,15 +95,43 @@ class Conversation(FacebookData):
         data["partner"] = self._metadata.title
         return data
 
+    @staticmethod
+    def _add_stats_columns(data: pd.DataFrame) -> pd.DataFrame:
+        # NOTE: computed once per message here, so ConversationStats
+        # only has to select and sum these columns
+        stats = StatsDataframe()(data)
+        for col in const.STAT_COLUMNS:
+            data[col] = stats[col].values
+        return data
+
+    @staticmethod
+    def _set_categorical_columns(data: pd.DataFrame) -> pd.DataFrame:
+        for col in const.CATEGORICAL_COLUMNS:
+            if col in data:
+                data[col] = data[col].astype("category")
+        return data
+
     def _get_thread_path(self, data: Dict) -> str:
         return self._get_dirname(data.get("thread_path"))
 
     def _get_media_dir(self, data: Dict) -> str:
-        for message in data.get("messages"):
+        messages = data.get("messages")
+        if isinstance(messages, pd.DataFrame):
+            # messages were read in chunks, e.g. by a streaming reader
+            messages = self._get_media_messages(messages)
+        for message in messages:
             if intersection := list(set(message) & set(const.MEDIA_DIRS)):
                 uri = message.get(intersection[0])[0].get("uri")
                 return self._get_dirname(os.path.dirname(os.path.dirname(uri)))
 
+    @staticmethod
+    def _get_media_messages(df: pd.DataFrame) -> List[Dict]:
+        media_cols = [col for col in const.MEDIA_DIRS if col in df]
+        if not media_cols:
+            return []
+        media = df[media_cols].stack()
+        return [{col: value} for (_, col), value in media.head(1).items()]
+
     @staticmethod
     def _get_participants(data: Dict) -> List[str]:
         return [
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import logging
+import os
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+
+import pandas as pd
+
+from miner.message.conversation import Conversation
+from miner.utils import const, filesystem, utils
+
+
+class CachedConversation(Conversation):
+    """
+    Class for restoring an already processed conversation from the cache.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        reader: Callable = utils.read_pickle,
+        processors: List[Callable] = None,
+    ) -> None:
+        super().__init__(path, reader=reader, processors=processors)
+
+    def _register_processors(self, preprocessor):
+        preprocessor.register_command(self._restore_metadata)
+        preprocessor.register_command(self._get_dataframe, field="data")
+        return preprocessor
+
+    def _restore_metadata(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        _metadata = data.get("metadata")
+        metadata = namedtuple("metadata", sorted(_metadata))
+        self._metadata = metadata(**_metadata)
+        return data
+
+
+class IncrementalConversation(Conversation):
+    """
+    Class for reading only the messages of a conversation
+    that are not ingested yet, e.g. when a newer export is downloaded.
+    Metadata is still read from the whole file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ingested: Tuple[int, int],
+        reader: Callable = None,
+        processors: List[Callable] = None,
+    ) -> None:
+        self.ingested: Tuple[int, int] = ingested
+        super().__init__(path, reader=reader, processors=processors)
+
+    def _register_processors(self, preprocessor):
+        # metadata is set in `_get_data`, before dropping the old messages
+        return self._register_message_processors(preprocessor)
+
+    def _get_data(self) -> pd.DataFrame:
+        raw_data = self._read_data(self.reader, self.path)
+        raw_data = self._set_metadata(raw_data)
+        raw_data["messages"] = self._get_new_messages(raw_data.get("messages"))
+        if not len(raw_data["messages"]):
+            return pd.DataFrame()
+        return self.preprocessor(raw_data)
+
+    def _get_new_messages(
+        self, messages: Union[List[Dict[str, Any]], pd.DataFrame]
+    ) -> Union[List[Dict[str, Any]], pd.DataFrame]:
+        first, last = self.ingested
+        if isinstance(messages, pd.DataFrame):
+            timestamps = messages.timestamp_ms
+            return messages[(timestamps < first) | (timestamps > last)]
+        return [
+            message
+            for message in messages
+            if not first <= message.get("timestamp_ms") <= last
+        ]
+
+    @staticmethod
+    def get_ingested_range(df: pd.DataFrame) -> Tuple[int, int]:
+        """
+
+        @param df: messages of a previously ingested conversation.
+        @return: timestamps of the first and last message in milliseconds.
+        """
+        return (
+            round(df.index.min().timestamp() * 1000),
+            round(df.index.max().timestamp() * 1000),
+        )
+
+
+class ConversationCache:
+    """
+    Class for persisting processed conversations next to the export.
+    Every thread is stored in its own file and is invalidated
+    when any of its `message_N.json` files changes in size or mtime.
+    """
+
+    VERSION = 4
+
+    def __init__(self, path: str) -> None:
+        self.data_path: str = path
+        # NOTE: exports read from a zip are cached next to the archive
+        self.path: str = filesystem.get_writable_path(
+            os.path.join(self.data_path, *const.CACHE_SUBPATH)
+        )
+        self.index_json: str = os.path.join(self.path, "index.json")
+
+        self._index: Dict[
+            str, List[List[Union[str, int]]]
+        ] = self._read_index()
+
+    def read(
+        self, directory: str, jsons: List[str]
+    ) -> Union[Conversation, None]:
+        key = self._get_key(directory)
+        if self._index.get(key) != self._get_signature(jsons):
+            return None
+        return self._load(key)
+
+    def read_stale(self, key: str) -> Union[Conversation, None]:
+        """
+        Reads a thread even if its jsons changed since it was cached,
+        e.g. for updating it with the messages of a newer export.
+
+        @param key: path of the thread relative to the export.
+        @return: the cached conversation, or None if it is not cached.
+        """
+        if key not in self._index:
+            return None
+        return self._load(key)
+
+    def write(
+        self, directory: str, jsons: List[str], convo: Conversation
+    ) -> None:
+        key = self._get_key(directory)
+        os.makedirs(self.path, exist_ok=True)
+        utils.dump_to_pickle(
+            self._get_cache_file(key),
+            {"data": convo.data, "metadata": convo.metadata._asdict()},
+        )
+        self._index[key] = self._get_signature(jsons)
+
+    def iter_dfs(self) -> Iterator[pd.DataFrame]:
+        """
+        Reads the cached threads one by one, e.g. for `ChunkedStats`.
+        Threads deleted from the export, or changed since they were cached,
+        are skipped, the index might still list them.
+
+        @return: iterator of the messages of every cached thread.
+        """
+        for key in list(self._index):
+            directory = os.path.join(self.data_path, key)
+            jsons = utils.walk_directory_and_search(
+                directory,
+                utils.get_all_jsons,
+                extension=".json",
+                contains_string="message_",
+            )
+            convo = self.read(directory, list(jsons))
+            if convo is not None:
+                yield convo.data
+
+    def register(self) -> None:
+        if not os.path.isdir(self.path):
+            return
+        utils.dump_to_json(
+            self.index_json, {"version": self.VERSION, "threads": self._index}
+        )
+
+    def _load(self, key: str) -> Union[Conversation, None]:
+        try:
+            return CachedConversation(path=self._get_cache_file(key))
+        except Exception as e:
+            logging.warning(f"Could not read cache for `{key}`: {e}")
+            return None
+
+    def _read_index(self) -> Dict[str, List[List[Union[str, int]]]]:
+        if not os.path.isfile(self.index_json):
+            return {}
+        index = utils.read_json(self.index_json)
+        if index.get("version") != self.VERSION:
+            return {}
+        return index.get("threads")
+
+    def _get_key(self, directory: str) -> str:
+        return os.path.relpath(directory, self.data_path)
+
+    def _get_cache_file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key.replace(os.sep, '.')}.pkl")
+
+    @staticmethod
+    def _get_signature(jsons: List[str]) -> List[List[Union[str, int]]]:
+        signature = []
+        for json in jsons:
+            signature.append(
+                [
+                    os.path.basename(json),
+                    filesystem.getsize(json),
+                    filesystem.get_mtime_ns(json),
+                ]
+            )
+        return sorted(signature)
@@ -1,18 +1,14 @@
 from __future__ import annotations
 
 import logging
-import math
-from typing import Any, Dict, List, Union
+from collections import Counter
+from typing import Any, Dict, List, Set, Tuple, Union
 
 import numpy as np
 import pandas as pd
-import polyglot
-from polyglot.detect import Detector
-from polyglot.detect.base import logger as polyglot_logger
 
-from miner.utils import command, const, period_manager, utils
-
-polyglot_logger.setLevel("ERROR")
+from miner.message import language_detector
+from miner.utils import command, const, decorators, period_manager, utils
 
 
 class ConversationStats:
@@ -22,10 +18,16 @@ class ConversationStats:
     """
 
     def __init__(self, df: pd.DataFrame, config: Dict[str, Any]) -> None:
-        self._df: pd.DataFrame = df
+        # NOTE: time-based stats are computed in the configured time zone
+        self._df: pd.DataFrame = utils.convert_tz(df, config.get("timezone"))
         self._config = config
         self._stats_df: pd.DataFrame = self._get_convos_in_numbers()
         self._stat_sum = self._stats_df.sum()
+        self._row_index: Dict[str, Dict[str, np.ndarray]] = {}
+        # NOTE: derived data is cached by `decorators.memoized_property`
+        self._memo: Dict[str, Any] = {}
+        self._memo_dependents: Dict[str, Set[str]] = {}
+        self._memo_stack: List[str] = []
 
     def __repr__(self) -> str:
         return f"ConversationStats for {self.number_of_channels} channels"
@@ -49,6 +51,37 @@ class ConversationStats:
         """
         return self._config
 
+    def invalidate(self, *names: str) -> None:
+        """
+        Drops cached derived data, e.g. after self.df was modified in place.
+
+        @param names: names of the properties to recompute, all if empty.
+        Properties derived from them are recomputed as well. If empty,
+        the stat columns (and so mc, wc, cc, etc.) are counted again too.
+        """
+        if not names:
+            self._memo.clear()
+            self._memo_dependents.clear()
+            self._row_index.clear()
+            self._stats_df = self._get_convos_in_numbers(recount=True)
+            self._stat_sum = self._stats_df.sum()
+            return
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            self._memo.pop(name, None)
+            pending += self._memo_dependents.pop(name, set())
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+
+        @return: approximate size in bytes of every cached property.
+        """
+        return {
+            name: utils.get_memory_usage(value)
+            for name, value in self._memo.items()
+        }
+
     def filter(
         self, df: pd.DataFrame = None, **kwargs: Any
     ) -> ConversationStats:
@@ -63,7 +96,11 @@ class ConversationStats:
         df = self._get_filtered_df(df, **kwargs)
         return ConversationStats(df, self.config)
 
-    def _get_convos_in_numbers(self) -> pd.DataFrame:
+    def _get_convos_in_numbers(self, recount: bool = False) -> pd.DataFrame:
+        # NOTE: the stat columns carried by self.df are used unless
+        # they might be stale, e.g. after self.df was modified in place
+        if not recount and all(col in self.df for col in const.STAT_COLUMNS):
+            return self.df[const.STAT_COLUMNS]
         stats = StatsDataframe()
         return stats(self.df)
 
@@ -149,7 +186,7 @@ class ConversationStats:
         """
         return self.df
 
-    @property
+    @decorators.memoized_property
     def text(self) -> pd.Series:
         """
 
@@ -161,7 +198,7 @@ class ConversationStats:
             else pd.Series()
         )
 
-    @property
+    @decorators.memoized_property
     def media(self) -> pd.DataFrame:
         """
 
@@ -172,13 +209,22 @@ class ConversationStats:
         else:
             return pd.DataFrame()
 
-    @property
+    @decorators.memoized_property
+    def word_counts(self) -> WordCounts:
+        """
+
+        @return: tokens of the text messages and their counts,
+        shared by all the word statistics.
+        """
+        return WordCounts(self.text)
+
+    @decorators.memoized_property
     def words(self) -> pd.Series:
         """
 
         @return: returns all the words in all the messages.
         """
-        return self._get_words(self.text)
+        return pd.Series(self.word_counts.words, dtype=object)
 
     @property
     def mc(self) -> int:
@@ -234,7 +280,7 @@ class ConversationStats:
 
         @return: unique words in all the messages this object.
         """
-        return len(set(self.words))
+        return len(self.word_counts.counts)
 
     @property
     def percentage_of_text_messages(self) -> float:
@@ -252,7 +298,7 @@ class ConversationStats:
         """
         return 100 - self.percentage_of_text_messages
 
-    @property
+    @decorators.memoized_property
     def most_used_msgs(self) -> pd.Series:
         """
 
@@ -264,19 +310,15 @@ class ConversationStats:
             .reset_index(name="counts")
         )
 
-    @property
+    @decorators.memoized_property
     def most_used_words(self) -> pd.Series:
         """
 
         @return: most occurring words in descending order.
         """
-        return (
-            self.words.value_counts()
-            .rename_axis("unique_values")
-            .reset_index(name="counts")
-        )
+        return self.word_counts.most_common()
 
-    @property
+    @decorators.memoized_property
     def wc_in_messages(self):
         """
 
@@ -288,7 +330,7 @@ class ConversationStats:
             wcs.append(length)
         return wcs
 
-    @property
+    @decorators.memoized_property
     def cc_in_messages(self):
         """
 
@@ -299,7 +341,7 @@ class ConversationStats:
             ccs.append(len(msg))
         return ccs
 
-    @property
+    @decorators.memoized_property
     def reacted_messages(self) -> pd.Series:
         """
 
@@ -365,28 +407,20 @@ class ConversationStats:
 
         @return: average word length.
         """
-        lengths = [len(i) for i in self.words]
-        return 0 if len(lengths) == 0 else (float(sum(lengths)) / len(lengths))
+        return self.word_counts.average_length
 
-    @property
+    @decorators.memoized_property
     def message_language_map(self) -> Dict[str, Dict[str, Any]]:
         """
 
         @return: detected (with polyglot library) language per message.
         """
-        map = {}
-        for msg in self.text:
-            try:
-                detect = Detector(msg)
-                map[msg] = {
-                    "lang": detect.language.name,
-                    "confidence": detect.language.confidence,
-                }
-            except polyglot.detect.base.UnknownLanguage:
-                map[msg] = None
-        return map
+        detector = self.config.get(
+            "language_detector", language_detector.LANGUAGE_DETECTOR
+        )
+        return detector.detect(self.text)
 
-    @property
+    @decorators.memoized_property
     def message_language_ratio(
         self,
     ) -> Dict[str, Union[Dict[str, int], Dict[str, float]]]:
@@ -411,6 +445,94 @@ class ConversationStats:
 
         return {"count": count_dict, "percent": percent_dict}
 
+    def get_stat_per(
+        self, column: str, statistic: str = "mc"
+    ) -> Union[pd.Series, None]:
+        """
+        Computes a numeric statistic for every value of a column
+        with one groupby, instead of filtering the messages value by value.
+
+        @param column: the column to group by, e.g. partner or sender_name.
+        @param statistic: numeric statistic, e.g. mc, wc, text_mc,
+        percentage_of_text_messages, unique_mc, number_of_channels.
+        @return: the statistic for every value of the column, or None
+        if the statistic can not be computed with a groupby.
+        """
+        if column not in self.df:
+            return None
+        keys = self.df[column].values
+        if statistic in self._stats_df:
+            return self._stats_df[statistic].groupby(keys).sum()
+        if statistic in (
+            "percentage_of_text_messages",
+            "percentage_of_media_messages",
+        ):
+            sums = self._stats_df[["text_mc", "mc"]].groupby(keys).sum()
+            percentage = sums.text_mc * 100 / sums.mc
+            if statistic == "percentage_of_media_messages":
+                percentage = 100 - percentage
+            return percentage
+        if statistic == "percentage_of_reacted_messages":
+            reacted = (
+                self.df.reactions.notna().values
+                if "reactions" in self.df
+                else np.zeros(len(self.df), dtype=bool)
+            )
+            return pd.Series(reacted * 100.0).groupby(keys).mean()
+        if statistic == "unique_mc":
+            if "content" not in self.df:
+                return pd.Series(0, index=pd.unique(keys))
+            return pd.Series(self.df.content.values).groupby(keys).nunique()
+        grouped_columns = {
+            "number_of_channels": "partner",
+            "number_of_contributors": "sender_name",
+        }
+        if grouped_columns.get(statistic) in self.df:
+            values = self.df[grouped_columns.get(statistic)].values
+            return pd.Series(values).groupby(keys).nunique()
+        return None
+
+    def get_summary_per(self, columns: List[str]) -> pd.DataFrame:
+        """
+        Summarizes the messages of every group in one pass,
+        e.g. per channel or per (channel, sender) pair.
+
+        @param columns: the columns to group by, e.g. partner, sender_name.
+        @return: first and last timestamp, first sender and the sums
+        of the stat columns for every group.
+        """
+        summary_columns = ["first", "last", "first_sender"]
+        if not len(self.df) or any(col not in self.df for col in columns):
+            return pd.DataFrame(columns=summary_columns + const.STAT_COLUMNS)
+        # NOTE: a stable sort keeps the order of messages sent at once,
+        # so the first row of a group is its first message
+        order = np.argsort(self.df.index.asi8, kind="mergesort")
+        frame = pd.DataFrame(
+            {
+                "first": self.df.index[order],
+                "first_sender": (
+                    self.df.sender_name.astype(object).values[order]
+                    if "sender_name" in self.df
+                    else None
+                ),
+                **{
+                    col: self.df[col].astype(object).values[order]
+                    for col in columns
+                },
+                **{
+                    col: self._stats_df[col].values[order]
+                    for col in const.STAT_COLUMNS
+                },
+            }
+        )
+        # NOTE: `groupby` drops rows with a missing key, so do they here
+        frame = frame.dropna(subset=columns)
+        grouped = frame.groupby(columns, sort=False)
+        summary = frame.drop_duplicates(columns).set_index(columns)
+        summary.insert(1, "last", grouped["first"].max())
+        summary[const.STAT_COLUMNS] = grouped[const.STAT_COLUMNS].sum()
+        return summary[summary_columns + const.STAT_COLUMNS]
+
     def get_grouped_time_series_data(
         self, timeframe: str = "y"
     ) -> pd.DataFrame:
@@ -449,17 +571,6 @@ class ConversationStats:
     def _media_message_extractor(self, kind: str) -> pd.Series:
         return self.df[kind].dropna() if kind in self.df else pd.Series()
 
-    @staticmethod
-    def _get_words(messages) -> pd.Series:
-        words = []
-        if not len(messages):
-            return pd.Series(words)
-        token_list = messages.str.lower().str.split()
-        for tokens in token_list:
-            for token in tokens:
-                words.append(token)
-        return pd.Series(words)
-
     def _count_stat_for_period(self, df, period, statistic) -> Dict[str, int]:
         # DOES too much
         periods = {}
@@ -473,11 +584,9 @@ class ConversationStats:
             0,
         )
 
-        for date, row in df.iterrows():
-            stat = row[statistic]
-            if stat is None:
-                continue
-            key = period_manager.PERIOD_MANAGER.date_to_period(date, period)
+        keys = period_manager.PERIOD_MANAGER.dates_to_periods(df.index, period)
+        stats = df[statistic].groupby(keys, sort=False).sum()
+        for key, stat in zip(stats.index.tolist(), stats.values):
             periods = utils.fill_dict(periods, key, stat)
         sorting_func = period_manager.PERIOD_MANAGER.sorting_method(period)
         periods = utils.sort_dict(periods, sorting_func)
@@ -498,6 +607,9 @@ class ConversationStats:
         @param kwargs: {start,end,period} : Union[str, datetime] = None
         @return:
         """
+        if df is self.df and (channels or senders):
+            df = self._filter_by_row_index(channels, senders)
+            channels, senders = None, None
         filter_messages = command.CommandChainCreator()
         filter_messages.register_command(
             utils.filter_by_channel, column="partner", channels=channels
@@ -508,58 +620,154 @@ class ConversationStats:
             senders=senders,
             me=self.config.get("profile").name,
         )
-        filter_messages.register_command(utils.filter_by_date, **kwargs)
+        filter_messages.register_command(
+            utils.filter_by_date,
+            timezone=self.config.get("timezone"),
+            **kwargs,
+        )
         filter_messages.register_command(utils.filter_empty_cols)
         return filter_messages(df)
 
+    def _filter_by_row_index(
+        self,
+        channels: Union[str, List[str]] = None,
+        senders: Union[str, List[str]] = None,
+    ) -> pd.DataFrame:
+        positions = np.arange(len(self.df))
+        if channels:
+            positions = self.get_row_positions("partner", channels)
+        if senders:
+            positions = np.intersect1d(
+                positions,
+                self.get_row_positions("sender_name", senders),
+                assume_unique=True,
+            )
+        return self.df.iloc[positions]
+
+    def get_row_positions(
+        self, column: str, values: Union[str, List[str]]
+    ) -> np.ndarray:
+        """
+
+        @param column: partner or sender_name.
+        @param values: channels or senders (`me` and `partner` included)
+        we are looking for.
+        @return: sorted positions of the matching rows in self.df.
+        """
+        if column not in self.df:
+            # same as the column filters, which leave the df untouched
+            return np.arange(len(self.df))
+        if column not in self._row_index:
+            self._row_index[column] = utils.get_row_index(self.df[column])
+        index = self._row_index[column]
+        values = [values] if isinstance(values, str) else values
+        me = self.config.get("profile").name
+        if values == ["me"]:
+            values = [me]
+        elif values == ["partner"]:
+            return np.setdiff1d(
+                np.arange(len(self.df)),
+                utils.lookup_rows(index, [me]),
+                assume_unique=True,
+            )
+        return utils.lookup_rows(index, values)
+
 
 class StatsDataframe:
+    # NOTE: messages are processed in chunks, because the intermediate
+    # arrays hold a value for every single character
+    CHUNKSIZE = 250_000
+    # every character for which `str.isspace` is True, i.e. `str.split` splits
+    # on, is below U+3001
+    IS_SPACE = np.array([chr(c).isspace() for c in range(0x3001)] + [False])
+
     def __call__(self, df) -> pd.DataFrame:
         self.df = pd.DataFrame(index=df.index)
 
         # all message count
-        self.df["mc"] = (
-            pd.Series([1 for _ in range(len(df))]).values if len(df) else 0
-        )
+        self.df["mc"] = np.ones(len(df), dtype=np.int64)
+
+        if "content" not in df:
+            for col in ("text_mc", "media_mc", "wc", "cc"):
+                self.df[col] = 0
+            return self.df
 
+        is_text = df.content.notna().values
         # text message count
-        self.df["text_mc"] = (
-            df.content.map(self.calculate_text_mc).values
-            if "content" in df
-            else 0
-        )
+        self.df["text_mc"] = is_text.astype(np.int64)
         # media message count
-        self.df["media_mc"] = (
-            df.content.map(self.calculate_media_mc).values
-            if "content" in df
-            else 0
+        self.df["media_mc"] = (~is_text).astype(np.int64)
+
+        wc = np.zeros(len(df), dtype=np.int64)
+        cc = np.zeros(len(df), dtype=np.int64)
+        wc[is_text], cc[is_text] = self.calculate_wc_and_cc(
+            df.content.values[is_text]
         )
         # word count
-        self.df["wc"] = (
-            df.content.map(self.calculate_wc).values if "content" in df else 0
+        self.df["wc"] = wc
+        # character count, not including whitespaces
+        self.df["cc"] = cc
+        return self.df
+
+    def calculate_wc_and_cc(
+        self, texts: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        wcs, ccs = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        for i in range(0, len(texts), self.CHUNKSIZE):
+            wc, cc = self._calculate_wc_and_cc(texts[i : i + self.CHUNKSIZE])
+            wcs.append(wc)
+            ccs.append(cc)
+        return np.concatenate(wcs), np.concatenate(ccs)
+
+    def _calculate_wc_and_cc(
+        self, texts: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        lengths = np.fromiter(
+            map(len, texts), dtype=np.int64, count=len(texts)
         )
-        # cc
-        self.df["cc"] = (
-            df.content.map(self.calculate_cc).values if "content" in df else 0
+        # every message is followed by a whitespace separator,
+        # so words can't span two messages and no message is zero long
+        codes = np.frombuffer(
+            ("\n".join(texts) + "\n").encode("utf-32-le", "surrogatepass"),
+            dtype=np.uint32,
         )
-        return self.df
+        is_space = self.IS_SPACE[np.minimum(codes, len(self.IS_SPACE) - 1)]
+        is_word_start = ~is_space
+        is_word_start[1:] &= is_space[:-1]
 
-    @staticmethod
-    def calculate_text_mc(content: Union[str, math.nan]) -> int:
-        return 0 if utils.is_nan(content) else 1
+        starts = np.zeros(len(texts), dtype=np.int64)
+        starts[1:] = np.cumsum(lengths + 1)[:-1]
+        spaces = np.add.reduceat(is_space, starts, dtype=np.int64) - 1
+        wc = np.add.reduceat(is_word_start, starts, dtype=np.int64)
+        cc = lengths - spaces
+        return wc, cc
 
-    @staticmethod
-    def calculate_media_mc(content: Union[str, math.nan]) -> int:
-        return 1 if utils.is_nan(content) else 0
 
-    @staticmethod
-    def calculate_wc(content: Union[str, math.nan]) -> int:
-        return 0 if utils.is_nan(content) else len(content.split())
+class WordCounts:
+    """
+    Class for tokenizing messages and counting the words in a single pass.
+    """
 
-    @staticmethod
-    def calculate_cc(content: Union[str, math.nan]) -> int:
-        return (
-            0
-            if utils.is_nan(content)
-            else sum([len(word) for word in content.split()])
+    def __init__(self, messages: pd.Series) -> None:
+        # NOTE: lowercasing and splitting the joined messages at once
+        # gives the same tokens as doing it message by message
+        self.words: List[str] = (
+            "\n".join(messages).lower().split() if len(messages) else []
+        )
+        self.counts: Counter = Counter(self.words)
+
+    @property
+    def average_length(self) -> float:
+        if not self.words:
+            return 0
+        lengths = sum(len(word) * count for word, count in self.counts.items())
+        return lengths / len(self.words)
+
+    def most_common(self) -> pd.DataFrame:
+        """
+
+        @return: words and their counts in descending order.
+        """
+        return pd.DataFrame(
+            self.counts.most_common(), columns=["unique_values", "counts"]
         )
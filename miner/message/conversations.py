@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 import os
-from typing import Callable, Dict, List, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+import pandas as pd
 
 from miner.message.conversation import Conversation
-from miner.utils import const, decorators, utils
+from miner.message.conversation_cache import (
+    ConversationCache,
+    IncrementalConversation,
+)
+from miner.utils import const, decorators, filesystem, utils
 
 
 class Conversations:
@@ -12,8 +19,29 @@ class Conversations:
     Class for managing and parsing conversations
     """
 
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self,
+        path: str,
+        cache: bool = True,
+        workers: Union[int, None] = None,
+        previous: Union[str, None] = None,
+    ) -> None:
+        """
+
+        @param path: path to the export.
+        @param cache: whether to store processed threads next to the export.
+        @param workers: number of processes for loading threads.
+        @param previous: path to a previously ingested (and cached) export.
+        Threads found there are only updated with their new messages.
+        """
         self.path: str = path
+        self.workers: Union[int, None] = workers
+        self._cache: Union[ConversationCache, None] = (
+            ConversationCache(self.path) if cache else None
+        )
+        self._previous: Union[ConversationCache, None] = (
+            ConversationCache(previous) if previous else None
+        )
 
         paths_factory: ConversationPathFactory = ConversationPathFactory(
             self.path
@@ -28,6 +56,9 @@ class Conversations:
             dir_lister=self._get_json_paths,
         )
 
+        if self._cache is not None:
+            self._cache.register()
+
     def __repr__(self):
         return (
             f"<Conversations for private{len(self.private)}, "
@@ -99,27 +130,128 @@ class Conversations:
     def _get_convos(
         self, directories: List[str], dir_lister: Callable
     ) -> Dict[str, Conversation]:
+        jsons_per_dir = {
+            directory: list(dir_lister(directory)) for directory in directories
+        }
+        convo_per_dir = {
+            directory: self._read_from_cache(directory, jsons)
+            for directory, jsons in jsons_per_dir.items()
+        }
+
+        for directory, convo in convo_per_dir.items():
+            if convo is not None:
+                continue
+            jsons = jsons_per_dir[directory]
+            convo = self._update_from_previous(directory, jsons)
+            if convo is not None:
+                self._write_to_cache(directory, jsons, convo)
+                convo_per_dir[directory] = convo
+
+        not_cached = [
+            directory
+            for directory, convo in convo_per_dir.items()
+            if convo is None
+        ]
+        loaded = self._load_convos(
+            [jsons_per_dir[directory] for directory in not_cached]
+        )
+        for directory, convo in zip(not_cached, loaded):
+            self._write_to_cache(directory, jsons_per_dir[directory], convo)
+            convo_per_dir[directory] = convo
+
         name_convo_map = {}
-        for directory in directories:
-            jsons = dir_lister(directory)
-            name_convo_map = self._merge_convo_files_if_needed(
-                name_convo_map, jsons
-            )
+        for convo in convo_per_dir.values():
+            name_convo_map[convo.metadata.title] = convo
         return name_convo_map
 
+    def _load_convos(self, jsons_list: List[List[str]]) -> List[Conversation]:
+        # NOTE: results keep the order of `jsons_list` in both modes
+        if not self.workers or self.workers < 2 or len(jsons_list) < 2:
+            return [
+                self._merge_convo_files_if_needed(jsons)
+                for jsons in jsons_list
+            ]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(
+                executor.map(self._merge_convo_files_if_needed, jsons_list)
+            )
+
+    def _read_from_cache(
+        self, directory: str, jsons: List[str]
+    ) -> Union[Conversation, None]:
+        if self._cache is None:
+            return None
+        return self._cache.read(directory, jsons)
+
+    def _update_from_previous(
+        self, directory: str, jsons: List[str]
+    ) -> Union[Conversation, None]:
+        if self._previous is None:
+            return None
+        previous = self._previous.read_stale(
+            os.path.relpath(directory, self.path)
+        )
+        if previous is None or not len(previous.data):
+            return None
+        ingested = IncrementalConversation.get_ingested_range(previous.data)
+        # NOTE: the parts are merged the same way as on a full load,
+        # so the metadata comes from all of them
+        convo = Conversation.merge(
+            [
+                IncrementalConversation(json, ingested)
+                for json in self._sort_parts(jsons)
+            ]
+        )
+        new_dfs = [convo.data] if len(convo.data) else []
+        # NOTE: the thread may have been renamed since it was ingested
+        ingested_df = previous.data.assign(
+            partner=pd.Categorical([convo.metadata.title] * len(previous.data))
+        )
+        convo.data = utils.stack_dfs(ingested_df, *new_dfs)
+        return convo
+
+    def _write_to_cache(
+        self, directory: str, jsons: List[str], convo: Conversation
+    ) -> None:
+        if self._cache is None:
+            return
+        self._cache.write(directory, jsons, convo)
+
     @staticmethod
-    def _merge_convo_files_if_needed(
-        convo_map: Dict[str, Conversation], jsons: List[str]
-    ) -> Dict[str, Conversation]:
-        try:
-            convo = Conversation(path=next(jsons))
-            while json := next(jsons):
-                convo += Conversation(path=json)
-        except StopIteration:
-            pass
-        finally:
-            convo_map[convo.metadata.title] = convo
-            return convo_map
+    def iter_threads(path: str, kind: str) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Lists the threads of an export without reading their messages,
+        e.g. for processing them one by one in bounded memory.
+
+        @param path: path to the export.
+        @param kind: one of private or group.
+        @return: iterator of the directory and the jsons of every thread.
+        """
+        for directory in ConversationsPaths(path, kind).directories:
+            yield directory, list(Conversations._get_json_paths(directory))
+
+    @staticmethod
+    def read_thread(jsons: List[str]) -> Conversation:
+        """
+
+        @param jsons: all the `message_N.json` files of a thread.
+        @return: the thread, with its parts merged.
+        """
+        return Conversations._merge_convo_files_if_needed(jsons)
+
+    @staticmethod
+    def _merge_convo_files_if_needed(jsons: List[str]) -> Conversation:
+        # NOTE: every part is parsed on its own, but they are merged at once
+        parts = Conversations._sort_parts(jsons)
+        return Conversation.merge([Conversation(path=json) for json in parts])
+
+    @staticmethod
+    def _sort_parts(jsons: List[str]) -> List[str]:
+        def part_number(json: str) -> int:
+            match = const.MESSAGE_PART_PATTERN.search(json)
+            return int(match.group(1)) if match else 0
+
+        return sorted(jsons, key=part_number)
 
     @staticmethod
     def _get_json_paths(path: str) -> List[str]:
@@ -145,6 +277,14 @@ class ConversationPathFactory:
 
 
 class ConversationsPaths:
+    """
+    Class for finding the directories of private or group conversations.
+    The thread type of every directory is cached with the mtime of its
+    `message_1.json`, so only new or changed threads are read again.
+    """
+
+    VERSION = 1
+
     def __init__(self, path: str, ctype: str) -> None:
         if ctype not in ("private", "group"):
             raise ValueError("Only `private` and `group` are supported.")
@@ -152,39 +292,60 @@ class ConversationsPaths:
         self.thread_type: str = const.MESSAGE_TYPE_MAP.get(self.ctype)
         self.data_path: str = path
 
-        # a cachefile will be written here
-        self.paths_json: str = os.path.join(
-            self.data_path,
-            *const.MESSAGES_SUBPATH,
-            f"{self.ctype}_messages.json",
+        # a cachefile will be written here, or next to the zip archive
+        self.paths_json: str = filesystem.get_writable_path(
+            os.path.join(
+                self.data_path,
+                *const.MESSAGES_SUBPATH,
+                f"{self.ctype}_messages.json",
+            )
         )
 
-        self._directories: List[str] = []
-
-        if not os.path.isfile(self.paths_json):
-            self.get_convos_paths()
-            self.register_paths()
-        self.read_paths()
+        self._threads: Dict[str, List[Union[int, str]]] = self.read_paths()
+        self._directories: List[str] = self.get_convos_paths()
 
     @property
     def directories(self) -> List[str]:
         return self._directories
 
-    def get_convos_paths(self) -> None:
-        directories = self.get_message_dirs(self.data_path)
-        for directory in directories:
-            convo = Conversation(
-                path=f"{directory}{os.sep}message_1.json", processors=[]
-            )  # NOTE we don't want to process it
-            if convo.data.get("thread_type") == self.thread_type:
-                self._directories.append(directory)
+    def get_convos_paths(self) -> List[str]:
+        threads, directories = {}, []
+        for directory in self.get_message_dirs(self.data_path):
+            key = os.path.relpath(directory, self.data_path)
+            json = os.path.join(directory, "message_1.json")
+            mtime = filesystem.get_mtime_ns(json)
+            cached = self._threads.get(key)
+            thread_type = (
+                cached[1]
+                if cached and cached[0] == mtime
+                else utils.read_thread_type(json)
+            )
+            threads[key] = [mtime, thread_type]
+            if thread_type == self.thread_type:
+                directories.append(directory)
+        if threads != self._threads:
+            self._threads = threads
+            self.register_paths()
+        return directories
 
     def register_paths(self) -> None:
         # Question: what if later I want to write this in a database?
-        utils.dump_to_json(self.paths_json, self.directories)
+        os.makedirs(os.path.dirname(self.paths_json), exist_ok=True)
+        utils.dump_to_json(
+            self.paths_json,
+            {"version": self.VERSION, "threads": self._threads},
+        )
 
-    def read_paths(self) -> None:
-        self._directories = utils.read_json(self.paths_json)
+    def read_paths(self) -> Dict[str, List[Union[int, str]]]:
+        if not os.path.isfile(self.paths_json):
+            return {}
+        paths = utils.read_json(self.paths_json)
+        # older cachefiles are plain lists of directories
+        if not isinstance(paths, dict):
+            return {}
+        if paths.get("version") != self.VERSION:
+            return {}
+        return paths.get("threads")
 
     @staticmethod
     def get_message_dirs(path: str) -> List[str]:
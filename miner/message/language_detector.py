@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Union
+
+import polyglot
+from polyglot.detect import Detector
+from polyglot.detect.base import logger as polyglot_logger
+
+polyglot_logger.setLevel("ERROR")
+
+
+def detect_language(text: str) -> Union[Dict[str, Any], None]:
+    """
+
+    @param text: a message.
+    @return: detected (with polyglot library) language and its confidence,
+    or None if the language is unknown.
+    """
+    try:
+        detect = Detector(text)
+    except polyglot.detect.base.UnknownLanguage:
+        return None
+    return {
+        "lang": detect.language.name,
+        "confidence": detect.language.confidence,
+    }
+
+
+class LanguageDetector:
+    """
+    Class for detecting the language of many messages. Every distinct text
+    is detected only once, in a process pool if there are workers,
+    and the results can be persisted in a JSON lines file keyed by
+    text hash. New results are appended, the file is never rewritten.
+    """
+
+    def __init__(
+        self,
+        cache_path: Union[str, None] = None,
+        workers: Union[int, None] = None,
+        chunksize: int = 1_000,
+    ) -> None:
+        self.cache_path: Union[str, None] = cache_path
+        self.workers: Union[int, None] = workers
+        self.chunksize: int = chunksize
+        # NOTE: the cache is read on first access, not when the app starts
+        self._cache: Union[Dict[str, Union[Dict[str, Any], None]], None] = None
+        # detected since the cache was last written
+        self._unsaved: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    @property
+    def cache(self) -> Dict[str, Union[Dict[str, Any], None]]:
+        if self._cache is None:
+            self._cache = self._read_cache()
+        return self._cache
+
+    def detect(
+        self, texts: Iterable[str]
+    ) -> Dict[str, Union[Dict[str, Any], None]]:
+        """
+
+        @param texts: messages, duplicates included.
+        @return: map of every distinct text to its language.
+        """
+        keys = {text: self._get_key(text) for text in texts}
+        missing = list(
+            {
+                key: text
+                for text, key in keys.items()
+                if key not in self.cache
+            }.items()
+        )
+        if missing:
+            languages = self._detect([text for _, text in missing])
+            for (key, _), language in zip(missing, languages):
+                self.cache[key] = language
+            self._unsaved += [key for key, _ in missing]
+            self.register()
+        return {text: self.cache[key] for text, key in keys.items()}
+
+    def register(self) -> None:
+        if self.cache_path is None or not self._unsaved:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "a", encoding="utf8") as f:
+                for key in self._unsaved:
+                    f.write(json.dumps([key, self.cache[key]]) + "\n")
+            self._unsaved = []
+        except OSError as e:
+            logging.warning(f"Could not write the language cache: {e}")
+
+    def _detect(self, texts: List[str]) -> List[Union[Dict[str, Any], None]]:
+        # NOTE: results keep the order of `texts` in both modes
+        if not self.workers or self.workers < 2 or len(texts) < 2:
+            return [detect_language(text) for text in texts]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(
+                executor.map(detect_language, texts, chunksize=self.chunksize)
+            )
+
+    def _read_cache(self) -> Dict[str, Union[Dict[str, Any], None]]:
+        if self.cache_path is None or not os.path.isfile(self.cache_path):
+            return {}
+        cache = {}
+        with open(self.cache_path, encoding="utf8") as f:
+            for line in f:
+                try:
+                    key, language = json.loads(line)
+                except ValueError:
+                    # e.g. a line cut in half by an interrupted write
+                    continue
+                cache[key] = language
+        return cache
+
+    @staticmethod
+    def _get_key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+LANGUAGE_DETECTOR = LanguageDetector()
@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+import pandas as pd
+
+from miner.message.conversation import Conversation
+from miner.message.conversation_cache import ConversationCache
+from miner.message.conversation_stats import ConversationStats
+from miner.message.conversations import Conversations
+from miner.utils import const, decorators, utils
+
+# columns of the messages that are kept in the store
+TEXT_COLUMNS = ["partner", "sender_name", "content", "type"]
+GROUP_BY_COLUMNS = ["partner", "sender_name"]
+
+
+class MessageStore:
+    """
+    Class for storing the messages of all the conversations in an embedded
+    SQLite database, so filters and aggregations run in the database
+    and only their results are loaded into memory.
+    It can be passed to the analyzers as `config["message_store"]`.
+    Messages are stored per thread, keyed by the directory of the thread,
+    as titles (e.g. `Facebook User`) are not unique.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, config: Dict[str, Any]) -> None:
+        self.path: str = path
+        self.config: Dict[str, Any] = config
+        self._connection: sqlite3.Connection = sqlite3.connect(self.path)
+        self._create_schema()
+
+    def __repr__(self) -> str:
+        return f"<MessageStore for {len(self)} messages>"
+
+    def __len__(self) -> int:
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM messages"
+        ).fetchone()[0]
+
+    @classmethod
+    def from_conversations(
+        cls, path: str, conversations: Conversations, config: Dict[str, Any]
+    ) -> MessageStore:
+        """
+
+        @param path: path of the database file.
+        @param conversations: conversations to be ingested.
+        @param config: app config, the user's name is read from its profile.
+        @return: the store with all the private and group messages.
+        """
+        store = cls(path, config)
+        store.ingest(conversations.private.values(), kind="private")
+        store.ingest(conversations.group.values(), kind="group")
+        return store
+
+    @classmethod
+    def from_path(
+        cls, path: str, data_path: str, config: Dict[str, Any]
+    ) -> MessageStore:
+        """
+
+        @param path: path of the database file.
+        @param data_path: path to the export.
+        @param config: app config, the user's name is read from its profile.
+        @return: the store with all the threads of the export,
+        which are read one by one.
+        """
+        store = cls(path, config)
+        store.ingest_export(data_path)
+        return store
+
+    def ingest_export(self, data_path: str) -> None:
+        """
+        Ingests an export thread by thread, so only one thread is in memory
+        at a time. Threads are read from the conversation cache if they are
+        cached, from their jsons otherwise. Threads that did not change
+        since they were ingested are skipped.
+
+        @param data_path: path to the export.
+        """
+        cache = ConversationCache(data_path)
+        for kind in ("private", "group"):
+            for directory, jsons in Conversations.iter_threads(
+                data_path, kind
+            ):
+                key = os.path.basename(directory)
+                signature = json.dumps(ConversationCache._get_signature(jsons))
+                if self._get_signature(key) == signature:
+                    continue
+                convo = cache.read(directory, jsons)
+                if convo is None:
+                    convo = Conversations.read_thread(jsons)
+                with self._connection:
+                    self._replace_thread(key, convo, kind)
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO threads VALUES (?, ?)",
+                        (key, signature),
+                    )
+                # NOTE: the thread is released before the next one is read
+                del convo
+
+    def ingest(
+        self, convos: Iterable[Conversation], kind: str = "private"
+    ) -> None:
+        """
+        Replaces the messages of the conversations in the store.
+
+        @param convos: conversations to be ingested one by one.
+        @param kind: one of private or group.
+        """
+        with self._connection:
+            for convo in convos:
+                self._replace_thread(self._get_thread_key(convo), convo, kind)
+
+    def get_stats_per_bucket(
+        self,
+        kind: str = None,
+        bucket_ms: int = const.STORE_BUCKET_MS,
+        **kwargs: Any,
+    ) -> pd.DataFrame:
+        """
+        Sums the stat columns of the matching messages in short intervals,
+        so e.g. time series can be computed without loading the messages.
+
+        @param kind: one of private or group, both if None.
+        @param bucket_ms: length of the intervals in milliseconds.
+        Every time zone offset is a multiple of 15 minutes, so by default
+        the intervals never span two local hours.
+        @param kwargs: filtering parameters.
+        @return: stat columns indexed by the start of the intervals in UTC.
+        """
+        where, params = self._get_where(kind=kind, **kwargs)
+        sums = ", ".join(f"SUM({col}) AS {col}" for col in const.STAT_COLUMNS)
+        df = pd.read_sql_query(
+            f"SELECT (timestamp_ms / {int(bucket_ms)}) * {int(bucket_ms)} "
+            f"AS timestamp_ms, {sums} FROM messages {where} "
+            f"GROUP BY 1 ORDER BY 1",
+            self._connection,
+            params=params,
+        )
+        df = df.set_index(
+            utils.ts_to_datetime_index(df.pop("timestamp_ms"), unit="ms")
+        )
+        return df.astype("int64")
+
+    def get_stats(self, kind: str = None, **kwargs: Any) -> ConversationStats:
+        """
+
+        @param kind: one of private or group, both if None.
+        @param kwargs: filtering parameters, channels, senders,
+        start, end and period, same as for ConversationStats.filter.
+        @return: ConversationStats of only the matching messages.
+        """
+        query, params = self._get_query(kind=kind, **kwargs)
+        df = pd.read_sql_query(query, self._connection, params=params)
+        return ConversationStats(self._to_messages_df(df), self.config)
+
+    def iter_dfs(
+        self, chunksize: int = 100_000, kind: str = None, **kwargs: Any
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Reads the matching messages in chunks, e.g. for `ChunkedStats`.
+
+        @param chunksize: maximum number of messages in a chunk.
+        @param kind: one of private or group, both if None.
+        @param kwargs: filtering parameters.
+        @return: iterator of the chunks of messages.
+        """
+        query, params = self._get_query(kind=kind, **kwargs)
+        for df in pd.read_sql_query(
+            query, self._connection, params=params, chunksize=chunksize
+        ):
+            yield self._to_messages_df(df)
+
+    def _get_query(self, **kwargs: Any) -> Tuple[str, List[Any]]:
+        where, params = self._get_where(**kwargs)
+        query = (
+            f"SELECT timestamp_ms, {', '.join(TEXT_COLUMNS)}, "
+            f"{', '.join(const.STAT_COLUMNS)} FROM messages {where} "
+            f"ORDER BY timestamp_ms"
+        )
+        return query, params
+
+    @staticmethod
+    def _to_messages_df(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.set_index(
+            pd.to_datetime(df.pop("timestamp_ms"), unit="ms", utc=True)
+        )
+        for col in const.CATEGORICAL_COLUMNS:
+            if col in df:
+                df[col] = df[col].astype("category")
+        return utils.filter_empty_cols(df)
+
+    def get_stat_count(
+        self, statistic: str = "mc", kind: str = None, **kwargs: Any
+    ) -> int:
+        """
+
+        @param statistic: one of the stat columns, e.g. mc, wc, cc.
+        @param kind: one of private or group, both if None.
+        @param kwargs: filtering parameters.
+        @return: the sum of the statistic over the matching messages.
+        """
+        self._check_column(statistic, const.STAT_COLUMNS)
+        where, params = self._get_where(kind=kind, **kwargs)
+        count = self._connection.execute(
+            f"SELECT SUM({statistic}) FROM messages {where}", params
+        ).fetchone()[0]
+        return count or 0
+
+    def get_stat_per(
+        self,
+        column: str,
+        statistic: str = "mc",
+        kind: str = None,
+        **kwargs: Any,
+    ) -> Dict[str, int]:
+        """
+
+        @param column: partner or sender_name.
+        @param statistic: one of the stat columns, e.g. mc, wc, cc.
+        @param kind: one of private or group, both if None.
+        @param kwargs: filtering parameters.
+        @return: the statistic for every value of the column,
+        in descending order.
+        """
+        self._check_column(column, GROUP_BY_COLUMNS)
+        self._check_column(statistic, const.STAT_COLUMNS)
+        where, params = self._get_where(kind=kind, **kwargs)
+        rows = self._connection.execute(
+            f"SELECT {column}, SUM({statistic}) AS stat FROM messages "
+            f"{where} GROUP BY {column} ORDER BY stat DESC",
+            params,
+        ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _create_schema(self) -> None:
+        stat_columns = ", ".join(
+            f"{col} INTEGER" for col in const.STAT_COLUMNS
+        )
+        with self._connection:
+            # NOTE: stores written by an older version are built again
+            version = self._connection.execute(
+                "PRAGMA user_version"
+            ).fetchone()[0]
+            if version != self.VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS messages")
+                self._connection.execute("DROP TABLE IF EXISTS threads")
+                self._connection.execute(
+                    f"PRAGMA user_version = {self.VERSION}"
+                )
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS messages ("
+                f"timestamp_ms INTEGER, kind TEXT, thread TEXT, "
+                f"{', '.join(f'{col} TEXT' for col in TEXT_COLUMNS)}, "
+                f"{stat_columns})"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS threads ("
+                "key TEXT PRIMARY KEY, signature TEXT)"
+            )
+            for col in ["timestamp_ms", "thread", "partner", "sender_name"]:
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS messages_{col} "
+                    f"ON messages ({col})"
+                )
+
+    def _get_signature(self, key: str) -> Union[str, None]:
+        row = self._connection.execute(
+            "SELECT signature FROM threads WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _replace_thread(
+        self, key: str, convo: Conversation, kind: str
+    ) -> None:
+        # NOTE: rows are replaced by thread, not by title, since the title
+        # might have changed, and other threads might have the same one
+        # timestamp_ms, kind and thread, then the text and stat columns
+        size = 3 + len(TEXT_COLUMNS) + len(const.STAT_COLUMNS)
+        placeholders = ", ".join(["?"] * size)
+        self._connection.execute(
+            "DELETE FROM messages WHERE thread = ?", (key,)
+        )
+        self._connection.executemany(
+            f"INSERT INTO messages VALUES ({placeholders})",
+            self._get_rows(convo.data, kind, key),
+        )
+
+    @staticmethod
+    def _get_thread_key(convo: Conversation) -> str:
+        # NOTE: the directory of the thread, e.g. `foobar_n5fd6gG50h`
+        return convo.metadata.thread_path or convo.metadata.title
+
+    @staticmethod
+    def _get_rows(
+        df: pd.DataFrame, kind: str, thread: str
+    ) -> Iterable[Tuple[Any, ...]]:
+        if not len(df):
+            return []
+        columns = [
+            (df.index.asi8 // 10 ** 6).tolist(),
+            [kind] * len(df),
+            [thread] * len(df),
+        ]
+        for col in TEXT_COLUMNS:
+            if col not in df:
+                columns.append([None] * len(df))
+                continue
+            columns.append(
+                [None if utils.is_nan(value) else value for value in df[col]]
+            )
+        for col in const.STAT_COLUMNS:
+            columns.append(df[col].astype(int).tolist())
+        return zip(*columns)
+
+    @decorators.start_end_period_checker
+    def _get_where(
+        self,
+        kind: str = None,
+        channels: Union[str, List[str]] = None,
+        senders: Union[str, List[str]] = None,
+        start: datetime = None,
+        end: datetime = None,
+        period: Any = None,
+    ) -> Tuple[str, List[Any]]:
+        conditions, params = [], []
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        if channels is not None:
+            channels = [channels] if isinstance(channels, str) else channels
+            # NOTE: an empty list of channels matches nothing
+            conditions.append(
+                f"partner IN ({', '.join(['?'] * len(channels))})"
+            )
+            params += channels
+        if senders:
+            senders = [senders] if isinstance(senders, str) else senders
+            me = self.config.get("profile").name
+            if senders == ["me"]:
+                senders = [me]
+            if senders == ["partner"]:
+                conditions.append("sender_name IS NOT ?")
+                params.append(me)
+            else:
+                conditions.append(
+                    f"sender_name IN ({', '.join(['?'] * len(senders))})"
+                )
+                params += senders
+        start, end = self._get_time_range(start, end, period)
+        if start is not None:
+            conditions.append("timestamp_ms >= ?")
+            params.append(round(start.timestamp() * 1000))
+        if end is not None:
+            conditions.append("timestamp_ms <= ?")
+            params.append(round(end.timestamp() * 1000))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    @staticmethod
+    def _get_time_range(
+        start: Union[datetime, None],
+        end: Union[datetime, None],
+        period: Any,
+    ) -> Tuple[Union[datetime, None], Union[datetime, None]]:
+        # NOTE: the same ranges as the ones of `utils.filter_by_date`
+        if start and period and not end:
+            return start, start + period
+        if end and period and not start:
+            return end - period, end
+        return start, end
+
+    @staticmethod
+    def _check_column(column: str, allowed: List[str]) -> None:
+        if column not in allowed:
+            raise ValueError(
+                f"Parameter should be one of {allowed}, got: `{column}`."
+            )
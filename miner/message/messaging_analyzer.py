@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import copy
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from miner.message.channel_membership import ChannelMembership
 from miner.message.conversation import Conversation
 from miner.message.conversation_stats import ConversationStats
 from miner.message.conversations import Conversations
-from miner.utils import command, decorators, utils
+from miner.message.message_store import MessageStore
+from miner.utils import command, const, decorators, utils
 
 pd.set_option("mode.chained_assignment", "raise")
 
@@ -44,9 +47,7 @@ class MessagingAnalyzerManager:
 
     @property
     def people_i_have_group_convo_with(self) -> List[str]:
-        return list(
-            self.group_messaging_analyzer.participant_to_channel_map.keys()
-        )
+        return self.group_messaging_analyzer.membership.participants
 
     def get_who_i_have_private_convo_with_from_a_group(
         self, group_name: str
@@ -81,27 +82,21 @@ class MessagingAnalyzerManager:
         return private, group
 
     def is_private_convo_first_then_group(self, name: str) -> bool:
-        private = self.private_messaging_analyzer.filter(channels=name)
-        group = self.group_messaging_analyzer.filter(participants=name)
-
-        if group is None or not len(group):
+        groups = self.group_messaging_analyzer.membership.get_channels(name)
+        if not groups:
             return True
 
-        group_start_times = []
-        for g in group.data.keys():
-            start_time = self.group_messaging_analyzer.filter(
-                channels=g
-            ).stats.start
-            if not start_time:
-                continue
-            group_start_times.append(start_time)
-
-        return any(
-            [
-                private.stats.start > group_start
-                for group_start in group_start_times
-            ]
+        private_start = self.private_messaging_analyzer.channel_summary[
+            "first"
+        ].get(name)
+        if private_start is None or pd.isna(private_start):
+            return False
+        group_start_times = (
+            self.group_messaging_analyzer.channel_summary["first"]
+            .reindex(groups)
+            .dropna()
         )
+        return bool((private_start > group_start_times).any())
 
     def get_stats_together(self, name: str) -> ConversationStats:
         stats = self.group_messaging_analyzer.stats_per_channel.values()
@@ -121,20 +116,38 @@ class MessagingAnalyzer:
         data: Dict[str, Conversation],
         config: Dict[str, Any],
         kind: str = "private",
+        df: pd.DataFrame = None,
+        membership: ChannelMembership = None,
+        is_filtered: bool = False,
     ) -> None:
         self.data = data  # channel to convo map
         self.config = config
         self._kind = kind
-        self.df: pd.DataFrame = self._get_df(self.data)
-
-        self._stats = ConversationStats(self.df, config)
-
-        self._participant_to_channel_map = utils.particip_to_channel_mapping(
-            data
+        # NOTE: the messages are stacked on first access, so an analyzer
+        # backed by a store might never hold all of them in memory
+        self._df: Union[pd.DataFrame, None] = (
+            None
+            if df is None
+            else utils.convert_tz(df, config.get("timezone"))
+        )
+        self._stats: Union[ConversationStats, None] = None
+        # NOTE: counts, rankings and time series are queried from the store
+        self._store: Union[MessageStore, None] = config.get("message_store")
+        self._is_filtered: bool = is_filtered
+
+        # NOTE: filtered analyzers get a subset of their parent's
+        self._membership: ChannelMembership = (
+            ChannelMembership.from_conversations(data)
+            if membership is None
+            else membership
         )
 
-        self._stats_per_channel = self._get_stats_per_channel()
-        self._stats_per_participant = self._get_stats_per_participant()
+        self._channel_summary: Union[pd.DataFrame, None] = None
+        self._sender_summary: Union[pd.DataFrame, None] = None
+        self._stats_per_channel: LazyStatsMap = self._get_stats_per_channel()
+        self._stats_per_participant: LazyStatsMap = (
+            self._get_stats_per_participant()
+        )
 
     def __repr__(self) -> str:
         return (
@@ -154,6 +167,18 @@ class MessagingAnalyzer:
         """
         return self._kind == "group"
 
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+
+        @return: the messages of all the channels in self.data.
+        """
+        if self._df is None:
+            self._df = utils.convert_tz(
+                self._get_df(self.data), self.config.get("timezone")
+            )
+        return self._df
+
     @property
     def stats(self) -> ConversationStats:
         """
@@ -161,34 +186,74 @@ class MessagingAnalyzer:
         @return: ConversationStats object containing stats
         on the current self.df.
         """
+        if self._stats is None:
+            self._stats = ConversationStats(self.df, self.config)
         return self._stats
 
     @property
-    def stats_per_channel(self) -> Dict[str, ConversationStats]:
+    def stats_per_channel(self) -> LazyStatsMap:
+        """
+
+        @return: a mapping that contains a ConversationStats object
+        for every channel in self.data. Stats are created on first access.
+        """
+        return self._stats_per_channel
+
+    @property
+    def stats_per_participant(self) -> LazyStatsMap:
         """
 
-        @return: a dict that contains a ConversationStats object
-        for every channel in self.data.
+        @return: a mapping that contains a ConversationStats object
+        for every participant in self.data. Stats are created on first access.
         """
-        return self._get_stats_per_channel()
+        return self._stats_per_participant
 
     @property
-    def stats_per_participant(self) -> Dict[str, ConversationStats]:
+    def channel_summary(self) -> pd.DataFrame:
         """
 
-        @return: a dict that contains a ConversationStats object
-        for every participant in self.data.
+        @return: first and last timestamp, first sender, message counts
+        and number of participants for every channel in self.data.
         """
-        return self._get_stats_per_participant()
+        if self._channel_summary is None:
+            summary = self.stats.get_summary_per(["partner"]).reindex(
+                list(self.data.keys())
+            )
+            summary["participants"] = pd.Series(
+                self._membership.get_channel_sizes(), dtype=np.int64
+            )
+            self._channel_summary = summary
+        return self._channel_summary
 
     @property
-    def participant_to_channel_map(self):
+    def sender_summary(self) -> pd.DataFrame:
+        """
+
+        @return: first and last timestamp and message counts
+        for every (channel, sender) pair in self.df.
+        """
+        if self._sender_summary is None:
+            self._sender_summary = self.stats.get_summary_per(
+                ["partner", "sender_name"]
+            )
+        return self._sender_summary
+
+    @property
+    def membership(self) -> ChannelMembership:
+        """
+
+        @return: sparse participant to channel incidence of self.data.
+        """
+        return self._membership
+
+    @property
+    def participant_to_channel_map(self) -> Dict[str, List[str]]:
         """
         Makes more sense for groups.
 
         @return: map for every participant to any channels they are in.
         """
-        return self._participant_to_channel_map
+        return self._membership.to_dict()
 
     @property
     def participants(self) -> List[str]:
@@ -197,10 +262,7 @@ class MessagingAnalyzer:
         @return: list of participants in self.data.
         """
         # super set of self.stats.contributors
-        participants = []
-        for _, convo in self.data.items():
-            participants += convo.metadata.participants
-        return sorted(list(set(participants)))
+        return self._membership.participants
 
     @property
     def number_of_convos_created_by_me(self) -> int:
@@ -208,9 +270,8 @@ class MessagingAnalyzer:
 
         @return: number of conversations started by the user.
         """
-        return sum(
-            [stat.created_by_me for stat in self.stats_per_channel.values()]
-        )
+        me = self.config.get("profile").name
+        return int((self.channel_summary.first_sender == me).sum())
 
     @property
     def min_channel_size(self) -> int:
@@ -219,8 +280,7 @@ class MessagingAnalyzer:
 
         @return: smallest group size.
         """
-        sizes = self._get_channels_size(self.data)
-        return min(sizes.values())
+        return min(self._membership.get_channel_sizes().values())
 
     @property
     def max_channel_size(self) -> int:
@@ -229,8 +289,7 @@ class MessagingAnalyzer:
 
         @return: largest group size.
         """
-        sizes = self._get_channels_size(self.data)
-        return max(sizes.values())
+        return max(self._membership.get_channel_sizes().values())
 
     @property
     def mean_channel_size(self) -> float:
@@ -239,7 +298,7 @@ class MessagingAnalyzer:
 
         @return: mean group size.
         """
-        sizes = self._get_channels_size(self.data)
+        sizes = self._membership.get_channel_sizes()
         return sum(sizes.values()) / len(sizes.values())
 
     def get_all_channels_for_one_person(self, name) -> List[str]:
@@ -250,11 +309,7 @@ class MessagingAnalyzer:
         @return: all the channels (max 1 private,
         and any number of group conversations) the subject is in.
         """
-        groups = []
-        for k, g in self.data.items():
-            if name in g.metadata.participants:
-                groups.append(k)
-        return list(set(groups))
+        return self._membership.get_channels(name)
 
     def get_stat_count(self, attr: str = "mc", **kwargs: Any) -> int:
         """
@@ -264,9 +319,47 @@ class MessagingAnalyzer:
         @param kwargs: filtering parameters.
         @return: the statistic one queried for.
         """
+        if self._store is not None and attr in const.STAT_COLUMNS:
+            return self._store.get_stat_count(
+                attr, **self._get_store_kwargs(**kwargs)
+            )
         stats = self.stats.filter(**kwargs)
         return getattr(stats, attr)
 
+    def get_stats_per_timeframe(
+        self, timeframe: str = "y", statistic: str = "mc", **kwargs: Any
+    ) -> Dict:
+        """
+
+        @param timeframe: in which timeframe you want to group the messages.
+        One of {y|m|d|h}.
+        @param statistic: one of the stat columns, e.g. mc, wc, cc.
+        @param kwargs: filtering parameters.
+        @return: the statistic broken down to the timeframe.
+        """
+        if self._store is None:
+            stats = self.stats.filter(**kwargs)
+        else:
+            stats = ConversationStats(
+                self._store.get_stats_per_bucket(
+                    **self._get_store_kwargs(**kwargs)
+                ),
+                self.config,
+            )
+        return stats.stats_per_timeframe(timeframe, statistic=statistic)
+
+    def _get_store_kwargs(self, **kwargs: Any) -> Dict[str, Any]:
+        channels = kwargs.get("channels")
+        channels = [channels] if isinstance(channels, str) else channels
+        if self._is_filtered:
+            # filtered analyzers query only their own channels
+            channels = [
+                channel
+                for channel in (channels or self.data)
+                if channel in self.data
+            ]
+        return {**kwargs, "channels": channels, "kind": self._kind}
+
     def get_ranking_of_people_by_convo_stats(
         self, statistic: str = "mc", top: int = 20
     ) -> Dict[str, Union[Dict[str, int], Dict[str, float]]]:
@@ -285,7 +378,7 @@ class MessagingAnalyzer:
         if len(stats_per_people) == 1:
             raise utils.TooFewPeopleError("Can't rank one person.")
 
-        count_dict = utils.get_count_dict(stats_per_people, statistic)
+        count_dict = self._get_count_dict(stats_per_people, statistic)
         percent_dict = utils.get_percent_dict(count_dict)
 
         if top:
@@ -318,7 +411,26 @@ class MessagingAnalyzer:
             participants=participants,
         )
         data = filter_messages(data)
-        return MessagingAnalyzer(data, self.config, self._kind)
+        return MessagingAnalyzer(
+            data,
+            self.config,
+            self._kind,
+            # the rows are only selected if self.df is built already
+            df=None if self._df is None else self._get_filtered_df(data),
+            membership=self._membership.subset(list(data)),
+            is_filtered=True,
+        )
+
+    def _get_filtered_df(self, data: Dict[str, Conversation]) -> pd.DataFrame:
+        # NOTE: rows of the channels are selected from the already stacked
+        # and sorted self.df, instead of stacking the conversations again
+        if len(data) == len(self.data):
+            return self.df
+        if not data:
+            return pd.DataFrame()
+        positions = self.stats.get_row_positions("partner", list(data))
+        # columns only the other channels have are dropped, like when stacking
+        return utils.filter_empty_cols(self.df.iloc[positions])
 
     def _get_stats_per_people(self):
         stats_per_people = (
@@ -328,22 +440,46 @@ class MessagingAnalyzer:
         )
         return stats_per_people
 
-    def _get_stats_per_channel(self) -> Dict[str, ConversationStats]:
-        return {
-            channel: ConversationStats(convo.data, self.config)
-            for channel, convo in self.data.items()
-        }
+    def _get_count_dict(
+        self, stats_per_people: LazyStatsMap, statistic: str
+    ) -> Dict[str, Union[int, float]]:
+        column = "sender_name" if self.is_group else "partner"
+        if self._store is not None and statistic in const.STAT_COLUMNS:
+            counts = pd.Series(
+                self._store.get_stat_per(
+                    column, statistic, **self._get_store_kwargs()
+                ),
+                dtype=np.int64,
+            )
+        else:
+            counts = self.stats.get_stat_per(column, statistic)
+        if counts is None:
+            # not computable with a groupby, falling back to stats per person
+            return utils.get_count_dict(stats_per_people, statistic)
+        counts = counts.reindex(list(stats_per_people), fill_value=0)
+        count_dict = dict(zip(counts.index, counts.fillna(0).tolist()))
+        return utils.sort_dict(
+            count_dict, func=lambda item: item[1], reverse=True
+        )
+
+    def _get_stats_per_channel(self) -> LazyStatsMap:
+        return LazyStatsMap(
+            list(self.data.keys()),
+            lambda channel: ConversationStats(
+                self.data[channel].data, self.config
+            ),
+        )
 
-    def _get_stats_per_participant(self) -> Dict[str, ConversationStats]:
-        stat_per_participant = {}
-        for name in self.participants:
-            stat_per_participant[name] = self.stats.filter(senders=name)
-        return stat_per_participant
+    def _get_stats_per_participant(self) -> LazyStatsMap:
+        return LazyStatsMap(
+            self.participants, lambda name: self.stats.filter(senders=name)
+        )
 
     @staticmethod
     def _get_df(convos) -> pd.DataFrame:
         if not convos:
             return pd.DataFrame()
+        # categorical columns keep their dtype through the stacking
         return utils.stack_dfs(*[convo.data for convo in convos.values()])
 
     @staticmethod
@@ -358,22 +494,48 @@ class MessagingAnalyzer:
         except KeyError:
             return {}
 
-    @staticmethod
     def _filter_by_participants(
-        data: Dict[str, Conversation], participants: List[str] = None
+        self, data: Dict[str, Conversation], participants: List[str] = None
     ) -> Dict[str, Conversation]:
         if not participants:
             return data
-        new_data = {}
-        for key, g in data.items():
-            if list(set(g.metadata.participants) & set(participants)):
-                new_data[key] = g
-        return new_data
+        # NOTE: data is a subset of self.data, so its channels are known
+        channels = set(self._membership.get_channels_of_any(participants))
+        return {key: g for key, g in data.items() if key in channels}
 
-    @staticmethod
-    def _get_channels_size(data) -> Dict[str, int]:
-        sizes = {}
-        for k, g in data.items():
-            size = len(g.metadata.participants)
-            sizes[k] = size
-        return sizes
+
+class LazyStatsMap(Mapping):
+    """
+    Read-only mapping of names to ConversationStats, where the stats
+    are created on first access and cached afterwards.
+    """
+
+    def __init__(
+        self, keys: List[str], factory: Callable[[str], ConversationStats]
+    ) -> None:
+        self._keys = keys
+        self._key_set = set(keys)
+        self._factory = factory
+        self._cache: Dict[str, ConversationStats] = {}
+
+    def __getitem__(self, key: str) -> ConversationStats:
+        if key not in self._cache:
+            if key not in self._key_set:
+                raise KeyError(key)
+            self._cache[key] = self._factory(key)
+        return self._cache[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._key_set
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return (
+            f"<LazyStatsMap of {len(self)} keys, "
+            f"{len(self._cache)} computed>"
+        )
@@ -5,6 +5,7 @@ from typing import Any, Callable, Dict, List, Union
 import pandas as pd
 
 from miner.friends import Friends
+from miner.message.channel_membership import ChannelMembership
 from miner.message.conversations import Conversations
 from miner.person import Person
 from miner.utils import utils
@@ -94,9 +95,9 @@ class People:
     def _convert_conversation_partners_to_persons(
         conversations: Conversations,
     ) -> Dict[str, Person]:
-        participant_to_channel_map = utils.particip_to_channel_mapping(
+        participant_to_channel_map = ChannelMembership.from_conversations(
             conversations.group
-        )
+        ).to_dict()
         persons = {}
         # looping over private message participants
         for name, convo in conversations.private.items():
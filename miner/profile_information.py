@@ -36,6 +36,4 @@ class ProfileInformation:
         )
 
     def _read(self) -> Any:
-        return utils.decode_data(
-            utils.read_json(self.path), utils.utf8_decoder
-        )
+        return utils.read_facebook_json(self.path)
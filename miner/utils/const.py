@@ -1,3 +1,4 @@
+import re
 from datetime import datetime, timedelta
 
 import pytz
@@ -7,6 +8,8 @@ from dateutil.relativedelta import relativedelta
 DATE_FORMAT = "%Y-%m-%d"
 HUNDRED_YEARS_IN_SECONDS = 100 * 365 * 24 * 60 * 60
 FACEBOOK_FOUNDATION_DATE = datetime(year=2004, month=2, day=4, tzinfo=pytz.UTC)
+# time zone of the analyses, dates are always stored in UTC
+DEFAULT_TIMEZONE = "UTC"
 
 
 MONTHS = [
@@ -62,6 +65,8 @@ ACCENTS_MAP = {
     "ű": "u",
 }
 
+# number of datetime components (year, month, day, hour) in a period
+PERIOD_COMPONENTS = {"y": 1, "m": 2, "d": 3, "h": 4}
 MESSAGE_TYPE_MAP = {"private": "Regular", "group": "RegularGroup"}
 STAT_MAP = {
     "mc": "Message",
@@ -70,8 +75,27 @@ STAT_MAP = {
     "wc": "Word",
     "cc": "Character",
 }
+STAT_COLUMNS = list(STAT_MAP.keys())
+# columns with only a few distinct values,
+# which are stored as categoricals to save memory
+CATEGORICAL_COLUMNS = ["partner", "sender_name", "type", "is_unsent"]
 
 PROFILE_INFORMATION_PATH = ["profile_information", "profile_information.json"]
 MESSAGES_SUBPATH = ["messages", "inbox"]
+CACHE_SUBPATH = ["messages", "cache"]
 FRIENDS_PATH = ["friends", "friends.json"]
 MEDIA_DIRS = ["photos", "gifs", "files", "videos", "audio_files"]
+
+# Facebook writes every byte of the UTF-8 encoded text as a separate
+# `\u00XX` escape; only the non-ASCII ones have to be turned back into bytes
+FACEBOOK_ESCAPE_PATTERN = re.compile(rb"\\u00[89a-fA-F][0-9a-fA-F]")
+# an unescaped `"thread_type": "..."` pair can only be a key of the thread;
+# Facebook writes it after the messages, so it is looked for at both ends
+THREAD_TYPE_PATTERN = re.compile(rb'(?<!\\)"thread_type"\s*:\s*"(\w*)"')
+THREAD_TYPE_BLOCKSIZE = 4096
+# messages are summed in intervals of this length in the message store
+STORE_BUCKET_MS = 15 * 60 * 1000
+# number of distinct messages tracked by the chunked stats
+CHUNKED_MAX_MSGS = 10_000
+# long threads are split into `message_1.json ... message_N.json`
+MESSAGE_PART_PATTERN = re.compile(r"message_(\d+)\.json$")
@@ -1,10 +1,9 @@
-import os
 from datetime import datetime
 from typing import Any, Union
 
 import pytz
 
-from miner.utils import const, utils
+from miner.utils import const, filesystem, utils
 
 
 class string_kwarg_to_list_converter:
@@ -32,14 +31,40 @@ class string_kwarg_to_list_converter:
         return wrapper
 
 
+def memoized_property(func):
+    """
+    Works like `property`, but the result is stored in the `_memo` dict
+    of the instance, so it is only computed again after it is invalidated.
+    Memoized properties used while computing another one are recorded
+    in `_memo_dependents`, so invalidating them can invalidate it too.
+    """
+    name = func.__name__
+
+    def wrapper(self):
+        if self._memo_stack:
+            self._memo_dependents.setdefault(name, set()).add(
+                self._memo_stack[-1]
+            )
+        if name not in self._memo:
+            self._memo_stack.append(name)
+            try:
+                self._memo[name] = func(self)
+            finally:
+                self._memo_stack.pop()
+        return self._memo[name]
+
+    wrapper.__doc__ = func.__doc__
+    return property(wrapper)
+
+
 def path_exists(func):
-    def wrapper(*args):
+    def wrapper(*args, **kwargs: Any):
         path = args[0]
-        if not os.path.exists(path):
+        if not filesystem.exists(path):
             raise FileNotFoundError(
                 f"`{path}` doe snot exist. You must specify a valid path."
             )
-        return func(*args)
+        return func(*args, **kwargs)
 
     return wrapper
 
@@ -105,25 +130,45 @@ def attribute_checker(func):
     return wrapper
 
 
-def read_and_localize(date: Union[str, None, datetime]):
+def read_and_localize(
+    date: Union[str, None, datetime], timezone: Union[str, None] = None
+):
+    """
+
+    @param date: datetime object or date string with format `YYYY-MM-DD`.
+    @param timezone: time zone of naive dates, UTC by default.
+    @return: timezone aware datetime object, or None.
+    """
     if date is None:
         return None
     if date and isinstance(date, str):
         date = datetime.strptime(date, const.DATE_FORMAT)
     if date.tzinfo is not None and date.tzinfo.utcoffset(date) is not None:
         return date
-    return pytz.timezone("UTC").localize(date)
+    return pytz.timezone(timezone or const.DEFAULT_TIMEZONE).localize(date)
 
 
 def start_end_period_checker(func):
+    """
+    Naive start and end dates are localized in the time zone
+    of the `timezone` keyword argument, which is not passed on,
+    or else in the one of the `config` of the instance, if any.
+    """
+
     def wrapper(*args, **kwargs: Any):
+        timezone = kwargs.pop("timezone", None)
+        if timezone is None and args:
+            config = getattr(args[0], "config", None)
+            if isinstance(config, dict):
+                timezone = config.get("timezone")
+
         if kwargs.get("start") is None and kwargs.get("end") is None:
             kwargs["start"] = const.FACEBOOK_FOUNDATION_DATE
             kwargs["end"] = utils.utcnow()
             return func(*args, **kwargs)
 
-        kwargs["start"] = read_and_localize(kwargs.get("start"))
-        kwargs["end"] = read_and_localize(kwargs.get("end"))
+        kwargs["start"] = read_and_localize(kwargs.get("start"), timezone)
+        kwargs["end"] = read_and_localize(kwargs.get("end"), timezone)
 
         if kwargs.get("period"):
             if const.DELTA_MAP[kwargs.get("period")] is None:
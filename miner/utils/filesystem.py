@@ -0,0 +1,149 @@
+"""
+Thin layer over the file system, which also treats the .zip of an export
+as a directory, e.g. `facebook.zip/messages/inbox/x/message_1.json`.
+Members of the archive are read straight from it, nothing is extracted.
+"""
+import os
+import zipfile
+from datetime import datetime
+from typing import IO, Dict, Iterator, List, Set, Tuple, Union
+
+ARCHIVE_EXTENSION = ".zip"
+
+
+class Archive:
+    """
+    Class for listing and reading the members of a zip archive.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.zip: zipfile.ZipFile = zipfile.ZipFile(path)
+        self.infos: Dict[str, zipfile.ZipInfo] = {
+            info.filename.rstrip("/"): info for info in self.zip.infolist()
+        }
+        self.dirs: Dict[str, Set[str]] = {"": set()}
+        self.files: Dict[str, List[str]] = {"": []}
+        self._build_tree()
+
+    def _build_tree(self) -> None:
+        for name, info in self.infos.items():
+            parent, _, base = name.rpartition("/")
+            self._add_dir(parent)
+            if info.is_dir():
+                self._add_dir(name)
+            else:
+                self.files[parent].append(base)
+
+    def _add_dir(self, name: str) -> None:
+        while name not in self.dirs:
+            self.dirs[name] = set()
+            self.files[name] = []
+            parent, _, base = name.rpartition("/")
+            self._add_dir(parent)
+            self.dirs[parent].add(base)
+            name = parent
+
+
+# NOTE: keyed by process too, forked workers must not share file offsets
+_ARCHIVES: Dict[Tuple[int, str], Archive] = {}
+
+
+def split(path: str) -> Tuple[Union[Archive, None], str]:
+    """
+
+    @param path: any path, possibly pointing into an archive.
+    @return: the archive and the member name within it,
+    or None and the path itself if it is not in an archive.
+    """
+    start = 0
+    while (index := path.find(ARCHIVE_EXTENSION, start)) != -1:
+        end = index + len(ARCHIVE_EXTENSION)
+        archive = path[:end]
+        if (end == len(path) or path[end] == os.sep) and os.path.isfile(
+            archive
+        ):
+            key = (os.getpid(), archive)
+            if key not in _ARCHIVES:
+                _ARCHIVES[key] = Archive(archive)
+            member = path[end + 1 :].rstrip(os.sep).replace(os.sep, "/")
+            return _ARCHIVES[key], member
+        start = end
+    return None, path
+
+
+def get_writable_path(path: str) -> str:
+    """
+    Archives are read-only, so files that would be written into them
+    (e.g. caches) go next to the archive, where it would be extracted.
+
+    @param path: any path, possibly pointing into an archive.
+    @return: the path itself, or its counterpart outside the archive.
+    """
+    archive, member = split(path)
+    if archive is None:
+        return path
+    root = archive.path[: -len(ARCHIVE_EXTENSION)]
+    return os.path.join(root, *member.split("/")) if member else root
+
+
+def exists(path: str) -> bool:
+    archive, member = split(path)
+    if archive is None:
+        return os.path.exists(path)
+    return member in archive.dirs or member in archive.infos
+
+
+def isfile(path: str) -> bool:
+    archive, member = split(path)
+    if archive is None:
+        return os.path.isfile(path)
+    return member in archive.infos and member not in archive.dirs
+
+
+def open_binary(path: str) -> IO[bytes]:
+    archive, member = split(path)
+    if archive is None:
+        return open(path, "rb")
+    return archive.zip.open(archive.infos[member])
+
+
+def getsize(path: str) -> int:
+    archive, member = split(path)
+    if archive is None:
+        return os.path.getsize(path)
+    return archive.infos[member].file_size
+
+
+def get_mtime_ns(path: str) -> int:
+    archive, member = split(path)
+    if archive is None:
+        return os.stat(path).st_mtime_ns
+    date_time = datetime(*archive.infos[member].date_time)
+    return int(date_time.timestamp()) * 10 ** 9
+
+
+def walk(path: str) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """
+    Works like `os.walk`, but also within archives.
+
+    @param path: root of the walk.
+    @return: iterator of (root, directories, files) tuples.
+    """
+    archive, member = split(path)
+    if archive is None:
+        yield from os.walk(path)
+        return
+    if member not in archive.dirs:
+        return
+    stack = [member]
+    while stack:
+        name = stack.pop()
+        dirs = sorted(archive.dirs[name])
+        root = (
+            os.path.join(archive.path, *name.split("/"))
+            if name
+            else (archive.path)
+        )
+        yield root, dirs, list(archive.files[name])
+        stack += [f"{name}/{d}" if name else d for d in reversed(dirs)]
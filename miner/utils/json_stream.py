@@ -0,0 +1,163 @@
+import codecs
+import json
+import logging
+from typing import Any, Dict, Iterator, Tuple
+
+import pandas as pd
+
+from miner.utils import decorators, filesystem, utils
+
+
+class FacebookJSONStream:
+    """
+    Class for reading a JSON file from the Facebook export incrementally.
+    The file is read block by block, and the Facebook encoding is fixed
+    on the fly, the same way as `utils.loads_facebook_json` does.
+    """
+
+    def __init__(self, file: str, blocksize: int = 2 ** 20) -> None:
+        self.file = file
+        self.blocksize = blocksize
+
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._blocks = self._read_blocks()
+
+    def read_object(self, field: str, chunksize: int) -> Dict[str, Any]:
+        """
+
+        @param field: key of the list that is read in chunks.
+        @param chunksize: number of list items per DataFrame chunk.
+        @return: the top-level object of the file, where `field`
+        is a DataFrame instead of a list of objects.
+        """
+        obj: Dict[str, Any] = {}
+        self._expect("{")
+        if self._skip("}"):
+            return obj
+        while True:
+            key = self._read_value()
+            self._expect(":")
+            if key == field:
+                obj[key] = self._read_list_as_dataframe(chunksize)
+            else:
+                obj[key] = self._read_value()
+            if self._skip("}"):
+                return obj
+            self._expect(",")
+
+    def _read_list_as_dataframe(self, chunksize: int) -> pd.DataFrame:
+        frames, chunk = [], []
+        for item in self._read_list():
+            chunk.append(item)
+            if len(chunk) == chunksize:
+                frames.append(pd.DataFrame(chunk))
+                chunk = []
+        if chunk or not frames:
+            frames.append(pd.DataFrame(chunk))
+        return pd.concat(frames, ignore_index=True, sort=False)
+
+    def _read_list(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._skip("]"):
+            return
+        while True:
+            yield self._read_value()
+            if self._skip("]"):
+                return
+            self._expect(",")
+
+    def _read_value(self) -> Any:
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # the value is most likely cut in half by the block boundary
+                if not self._fill_buffer():
+                    raise
+                continue
+            # a number at the end of the buffer might continue in next block
+            if end == len(self._buffer) and self._fill_buffer():
+                continue
+            self._pos = end
+            return value
+
+    def _skip(self, char: str) -> bool:
+        self._skip_whitespace()
+        if self._buffer.startswith(char, self._pos):
+            self._pos += len(char)
+            return True
+        return False
+
+    def _expect(self, char: str) -> None:
+        if not self._skip(char):
+            raise ValueError(
+                f"Expected `{char}` at position {self._pos} in `{self.file}`."
+            )
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            while (
+                self._pos < len(self._buffer)
+                and self._buffer[self._pos] in " \t\n\r"
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill_buffer():
+                return
+
+    def _fill_buffer(self) -> bool:
+        text = next(self._blocks, None)
+        if text is None:
+            return False
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+        return True
+
+    def _read_blocks(self) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        carry = b""
+        with filesystem.open_binary(self.file) as f:
+            while block := f.read(self.blocksize):
+                data, carry = self._split_incomplete_escape(carry + block)
+                yield decoder.decode(utils.unescape_facebook_bytes(data))
+        yield decoder.decode(utils.unescape_facebook_bytes(carry), final=True)
+
+    @staticmethod
+    def _split_incomplete_escape(data: bytes) -> Tuple[bytes, bytes]:
+        # an escape (`\u00XX`) or backslash pair (`\\`) might be cut in half
+        # at the end of the block, so the trailing run of backslashes
+        # is kept for the next block
+        index = data.rfind(b"\\", max(len(data) - 6, 0))
+        if index == -1:
+            return data, b""
+        while index > 0 and data[index - 1 : index] == b"\\":
+            index -= 1
+        return data[:index], data[index:]
+
+
+@decorators.path_exists
+def read_json_in_chunks(
+    file: str, field: str = "messages", chunksize: int = 10_000
+) -> Dict[str, Any]:
+    """
+    Streaming alternative of `utils.read_facebook_json`, which can be used
+    as the `reader` of `FacebookData`. Peak memory is bounded by one chunk
+    of parsed objects on top of the resulting DataFrame.
+
+    @param file: path to the JSON file.
+    @param field: key of the list that is read in chunks.
+    @param chunksize: number of list items per DataFrame chunk.
+    @return: the top-level object of the file, where `field`
+    is a DataFrame instead of a list of objects.
+    """
+    try:
+        return FacebookJSONStream(file).read_object(field, chunksize)
+    except UnicodeDecodeError:
+        logging.warning(
+            f"Could not stream `{file}`, reading the whole file instead."
+        )
+        data = utils.read_facebook_json(file)
+        data[field] = pd.DataFrame(data.get(field))
+        return data
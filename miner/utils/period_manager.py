@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
 from dateutil.relativedelta import relativedelta
 
 from miner.utils import const
@@ -9,12 +11,21 @@ from miner.utils import const
 class PeriodManager:
     @staticmethod
     def set_df_indices_to_datetime(df, timeframe):
-        datetimes = []
-        for index, row in df.iterrows():
-            key = PERIOD_MANAGER.ordinal_to_datetime(timeframe, index)
-            datetimes.append(key)
-
-        df["timestamp"] = datetimes
+        # NOTE: the group keys (year, month, day, hour) are turned into
+        # datetimes column-wise instead of row by row
+        components = ["year", "month", "day", "hour"][
+            : const.PERIOD_COMPONENTS[timeframe]
+        ]
+        keys = pd.DataFrame(
+            {
+                component: df.index.get_level_values(i)
+                for i, component in enumerate(components)
+            }
+        )
+        for component in ("month", "day"):
+            if component not in keys:
+                keys[component] = 1
+        df["timestamp"] = pd.to_datetime(keys).values if len(df) else []
         return df.set_index("timestamp", drop=True)
 
     @staticmethod
@@ -40,6 +51,24 @@ class PeriodManager:
         if period == "h":
             return datetime(*index)
 
+    @staticmethod
+    def dates_to_periods(dates, period):
+        """
+        Vectorized `date_to_period`.
+
+        @param dates: DatetimeIndex.
+        @param period: one of {y|m|d|h}.
+        @return: the period of every date.
+        """
+        if period == "y":
+            return dates.year
+        if period == "m":
+            return np.array(const.MONTHS)[dates.month - 1]
+        if period == "d":
+            return np.array(const.WEEKDAYS)[dates.weekday]
+        if period == "h":
+            return dates.hour
+
     @staticmethod
     def date_to_period(date, period):
         if period == "y":
@@ -3,16 +3,18 @@ import json
 import logging
 import math
 import os
+import sys
 import time
-import zipfile
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 import pytz
+from pandas.api.types import is_categorical_dtype
 from yaml import FullLoader, load
 
-from miner.utils import const, decorators
+from miner.utils import const, decorators, filesystem
 
 
 class TooFewPeopleError(Exception):
@@ -27,22 +29,6 @@ class NonExistentChannel(Exception):
     pass
 
 
-def particip_to_channel_mapping(data):
-    group_convo_map = {}
-    if not data:
-        return group_convo_map
-    for channel, convo in data.items():
-        for participant in convo.metadata.participants:
-            group_convo_map = fill_dict(
-                group_convo_map, participant, [channel]
-            )
-            group_convo_map[participant] = list(
-                set(group_convo_map.get(participant))
-            )  # just making sure there is no duplicate,
-            # so I don't have to go over it again later
-    return group_convo_map
-
-
 def get_period_map(join_date):
     const.PERIOD_MAP["y"] = list(range(join_date.year, utcnow().year + 1))
     return const.PERIOD_MAP
@@ -50,25 +36,90 @@ def get_period_map(join_date):
 
 @decorators.path_exists
 def unzip(path):
-    if not path.endswith(".zip"):
-        return path
-    with zipfile.ZipFile(path, "r") as zip_ref:
-        new_path = path.split(".zip")[0]
-        zip_ref.extractall()
-        return new_path
+    # NOTE: the members of a zip are read straight from the archive
+    # (see `filesystem`), so it is not extracted anymore,
+    # and media files are never touched
+    return path
 
 
 @decorators.path_exists
 def read_json(file) -> Union[Dict, List]:
-    with open(file) as f:
+    with filesystem.open_binary(file) as f:
         return json.load(f)
 
 
+@decorators.path_exists
+def read_facebook_json(file) -> Union[Dict, List]:
+    with filesystem.open_binary(file) as f:
+        return loads_facebook_json(f.read())
+
+
+@decorators.path_exists
+def read_thread_type(file) -> Union[str, None]:
+    """
+    Reads the thread type of a conversation without parsing the messages.
+    Only the first and last block of the file are searched,
+    and the whole file is parsed only if neither contains the key.
+
+    @param file: path to a `message_N.json` file.
+    @return: the thread type, e.g. `Regular` or `RegularGroup`.
+    """
+    size = filesystem.getsize(file)
+    with filesystem.open_binary(file) as f:
+        blocks = [f.read(const.THREAD_TYPE_BLOCKSIZE)]
+        if size > const.THREAD_TYPE_BLOCKSIZE:
+            f.seek(max(size - const.THREAD_TYPE_BLOCKSIZE, 0))
+            blocks.append(f.read())
+    for block in reversed(blocks):
+        if match := const.THREAD_TYPE_PATTERN.search(block):
+            return match.group(1).decode()
+    return read_facebook_json(file).get("thread_type")
+
+
+def loads_facebook_json(raw: bytes) -> Union[Dict, List]:
+    """
+    Parses Facebook's JSON and fixes its encoding on the byte level,
+    which gives the same result as `decode_data` with `utf8_decoder`,
+    but without walking and copying the parsed data.
+
+    @param raw: contents of a JSON file from the Facebook export.
+    @return: the parsed and decoded data.
+    """
+    try:
+        return json.loads(unescape_facebook_bytes(raw).decode("utf-8"))
+    except UnicodeDecodeError:
+        data = json.loads(raw)
+        try:
+            return decode_data(data, utf8_decoder)
+        except UnicodeError as e:
+            logging.error(f"Could not decode data: {e}")
+            return data
+
+
+def unescape_facebook_bytes(raw: bytes) -> bytes:
+    # escaped backslashes are protected so `\\u00e9` stays literal text
+    unescaped = raw.replace(b"\\\\", b"\\u005c")
+    # only a handful of distinct bytes occur in practice, so replacing them
+    # one by one is much faster than a substitution per match
+    for escape in set(const.FACEBOOK_ESCAPE_PATTERN.findall(unescaped)):
+        unescaped = unescaped.replace(escape, bytes([int(escape[4:], 16)]))
+    return unescaped
+
+
 def dump_to_json(file, data=None):
     with open(file, "w", encoding="utf8") as f:
         json.dump(data, f, ensure_ascii=False)
 
 
+@decorators.path_exists
+def read_pickle(file) -> Any:
+    return pd.read_pickle(file)
+
+
+def dump_to_pickle(file, data=None):
+    pd.to_pickle(data, file)
+
+
 def df_to_str(kind, df):
     if kind == "json":
         return df.to_json(orient="table")
@@ -116,6 +167,33 @@ def ts_to_date(date: int, tz=pytz.timezone("UTC")):
     return datetime.fromtimestamp(date, tz=tz)
 
 
+def ts_to_datetime_index(timestamps: Any, unit: str = "s") -> pd.DatetimeIndex:
+    """
+    Vectorized `ts_to_date`, timestamps are converted in one go.
+
+    @param timestamps: integer timestamps, e.g. a column of messages.
+    @param unit: unit of the timestamps, s or ms.
+    @return: tz-aware index in UTC.
+    """
+    return pd.DatetimeIndex(pd.to_datetime(timestamps, unit=unit, utc=True))
+
+
+def convert_tz(df: pd.DataFrame, tz: Union[str, None]) -> pd.DataFrame:
+    """
+    Converts the index of messages to the time zone of the analysis,
+    so e.g. hours and weekdays are counted in local time.
+
+    @param df: data with a tz-aware DatetimeIndex.
+    @param tz: name of the time zone, e.g. `Europe/Budapest`.
+    @return: df itself if it is already in the time zone, else a view.
+    """
+    if tz is None or not isinstance(df.index, pd.DatetimeIndex):
+        return df
+    if df.index.tz is None or str(df.index.tz) == str(tz):
+        return df
+    return df.tz_convert(tz, copy=False)
+
+
 def dt(
     y: int = 2004,
     m: int = 1,
@@ -192,7 +270,7 @@ def get_all_jsons(root, files, extension, contains_string) -> List[str]:
 
 def walk_directory_and_search(path, func, extension, contains_string=""):
     paths = []
-    for root, _, files in os.walk(path):
+    for root, _, files in filesystem.walk(path):
         res = func(root, files, extension, contains_string)
         if isinstance(res, list):
             paths += res
@@ -233,11 +311,76 @@ def decode_data(
     return obj
 
 
+def get_memory_usage(obj: Any) -> int:
+    """
+    Approximates the memory used by an object and everything it holds.
+
+    @param obj: e.g. a DataFrame, a Series or a container of them.
+    @return: size in bytes.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            get_memory_usage(key) + get_memory_usage(value)
+            for key, value in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(get_memory_usage(i) for i in obj)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + get_memory_usage(vars(obj))
+    return sys.getsizeof(obj)
+
+
 # dataframe utils
 def stack_dfs(*args, sort=True):
+    df = pd.concat(unify_categoricals(*args))
     if not sort:
-        return pd.concat(args)
-    return pd.concat(args).sort_index()
+        return df
+    # NOTE: the dfs are usually sorted already,
+    # and a stable merge sort makes use of these runs
+    return df.sort_index(kind="mergesort")
+
+
+def unify_categoricals(*dfs: pd.DataFrame) -> List[pd.DataFrame]:
+    """
+    Sets the same categories for the categorical columns of all the dfs,
+    otherwise pd.concat would turn these columns into plain objects.
+
+    @param dfs: the dfs to be concatenated.
+    @return: shallow copies of the dfs, with only the categorical
+    columns replaced.
+    """
+    columns = {
+        col for df in dfs for col in df.select_dtypes("category").columns
+    }
+    if not columns:
+        return list(dfs)
+    dfs = [df.copy(deep=False) for df in dfs]
+    for col in columns:
+        categories = [
+            np.asarray(
+                df[col].cat.categories
+                if is_categorical_dtype(df[col])
+                else df[col].dropna().unique(),
+                dtype=object,
+            )
+            for df in dfs
+            if col in df
+        ]
+        dtype = pd.CategoricalDtype(pd.unique(np.concatenate(categories)))
+        for df in dfs:
+            if col in df:
+                df[col] = df[col].astype(dtype)
+            else:
+                df[col] = pd.Categorical.from_codes(
+                    np.full(len(df), -1), dtype=dtype
+                )
+    return dfs
 
 
 @decorators.start_end_period_checker
@@ -304,6 +447,43 @@ def handle_filter_df(df, column, filter_params):
     return match
 
 
+def get_row_index(column: pd.Series) -> Dict[Any, np.ndarray]:
+    """
+    Builds an inverted index of a column, so rows with given values
+    can be looked up without scanning the whole column.
+
+    @param column: the column to index, e.g. partner or sender_name.
+    @return: map of every value to the sorted positions of its rows.
+    """
+    categorical = pd.Categorical(column)
+    codes = categorical.codes
+    # missing values have the code -1, so they end up before the first bound
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(
+        codes[order], np.arange(len(categorical.categories) + 1)
+    )
+    return {
+        value: order[start:end]
+        for value, start, end in zip(
+            categorical.categories, bounds[:-1], bounds[1:]
+        )
+        if end > start
+    }
+
+
+def lookup_rows(index: Dict[Any, np.ndarray], values: List[Any]) -> np.ndarray:
+    """
+
+    @param index: inverted index built by `get_row_index`.
+    @param values: the values we are looking for.
+    @return: sorted positions of the rows with any of the values.
+    """
+    positions = [index[value] for value in values if value in index]
+    if not positions:
+        return np.array([], dtype=np.intp)
+    return np.sort(np.concatenate(positions))
+
+
 def filter_empty_cols(df: pd.DataFrame):
     non_null_columns = [
         col for col in df.columns if df.loc[:, col].notna().any()
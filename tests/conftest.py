@@ -1,4 +1,5 @@
 import os
+import shutil
 
 import pytest
 import pandas as pd
@@ -15,11 +16,46 @@ TEST_DATA_PATH = (
 )
 
 
+def _copy_data(source, destination):
+    # leaving out the caches that might have been written by other tests
+    shutil.copytree(
+        source,
+        destination,
+        ignore=shutil.ignore_patterns("*_messages.json", "cache"),
+    )
+    return destination
+
+
+@pytest.fixture(scope="session", autouse=True)
+def clean_test_data():
+    yield
+    # tear-down of whatever any test wrote next to the test data
+    for kind in ("private", "group"):
+        path = os.path.join(
+            TEST_DATA_PATH, *const.MESSAGES_SUBPATH, f"{kind}_messages.json"
+        )
+        if os.path.isfile(path):
+            os.remove(path)
+    shutil.rmtree(
+        os.path.join(TEST_DATA_PATH, *const.CACHE_SUBPATH), ignore_errors=True
+    )
+
+
 @pytest.fixture(scope="session")
 def DATA_PATH():
     return TEST_DATA_PATH
 
 
+@pytest.fixture()
+def copy_data():
+    return _copy_data
+
+
+@pytest.fixture()
+def data_path(DATA_PATH, tmp_path):
+    return _copy_data(DATA_PATH, os.path.join(tmp_path, "test_data"))
+
+
 @pytest.fixture(scope="session")
 def app():
     return App(path=TEST_DATA_PATH)
@@ -32,18 +68,7 @@ def friends():
 
 @pytest.fixture(scope="session")
 def conversations():
-    yield Conversations(f"{TEST_DATA_PATH}")
-    # tear-down
-    os.remove(
-        os.path.join(
-            TEST_DATA_PATH, *const.MESSAGES_SUBPATH, "private_messages.json"
-        )
-    )
-    os.remove(
-        os.path.join(
-            TEST_DATA_PATH, *const.MESSAGES_SUBPATH, "group_messages.json"
-        )
-    )
+    return Conversations(f"{TEST_DATA_PATH}")
 
 
 @pytest.fixture(scope="session")
@@ -63,12 +88,12 @@ def ganalyzer(analyzer):
 
 @pytest.fixture(scope="session")
 def priv_stats(panalyzer):
-    return panalyzer._stats
+    return panalyzer.stats
 
 
 @pytest.fixture(scope="session")
 def group_stats(ganalyzer):
-    return ganalyzer._stats
+    return ganalyzer.stats
 
 
 @pytest.fixture(scope="session")
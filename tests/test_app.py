@@ -1,8 +1,11 @@
+from miner.app import App
 from miner.friends import Friends
 from miner.message.conversations import Conversations
+from miner.message.message_store import MessageStore
 from miner.message.messaging_analyzer import MessagingAnalyzerManager
 from miner.people import People
 from miner.profile_information import ProfileInformation
+from miner.utils import utils
 
 
 class TestApp:
@@ -30,3 +33,43 @@ class TestApp:
     def test_profile_information(self, app):
         pi = app.profile_information
         assert isinstance(pi, ProfileInformation)
+
+    def test_components_are_built_lazily(self, DATA_PATH):
+        app = App(path=DATA_PATH)
+        assert app._friends is None
+        assert app._conversations is None
+        assert app._analyzer is None
+        assert app._people is None
+
+        assert isinstance(app.friends, Friends)
+        assert app._conversations is None
+        assert app.friends is app.friends
+
+    def test_message_store(self, app, data_path):
+        store_app = App(path=data_path, message_store=True)
+        assert isinstance(store_app.friends, Friends)
+        # the store is only built when the messages are analyzed
+        assert "message_store" not in store_app.config
+        assert store_app.analyzer.group.get_stat_count("cc") == (
+            app.analyzer.group.stats.cc
+        )
+        store = store_app.config.get("message_store")
+        assert isinstance(store, MessageStore)
+        assert store_app.analyzer.group._df is None
+        store.close()
+
+    def test_workers_are_passed_on(self, DATA_PATH):
+        app = App(path=DATA_PATH, workers=2)
+        assert app.config.get("language_detector").workers == 2
+        assert app.conversations.workers == 2
+
+    def test_configured_timezone_is_the_default(self, DATA_PATH, monkeypatch):
+        monkeypatch.setattr(
+            utils,
+            "read_yaml",
+            lambda _: {"general": {"TIMEZONE": "Europe/Budapest"}},
+        )
+        assert App(path=DATA_PATH).config.get("timezone") == "Europe/Budapest"
+        assert App(path=DATA_PATH, timezone="UTC").config.get("timezone") == (
+            "UTC"
+        )
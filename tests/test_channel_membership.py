@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from miner.message.channel_membership import ChannelMembership
+
+
+@pytest.fixture()
+def membership(conversations):
+    return ChannelMembership.from_conversations(conversations.group)
+
+
+def test_matches_metadata(conversations, membership):
+    groups = conversations.group
+    expected = {}
+    for channel, convo in groups.items():
+        for name in convo.metadata.participants:
+            expected.setdefault(name, set()).add(channel)
+
+    assert membership.participants == sorted(expected)
+    assert membership.channels == list(groups.keys())
+    assert membership.shape == (len(expected), len(groups))
+    assert {
+        name: set(channels) for name, channels in membership.to_dict().items()
+    } == expected
+    for channel, convo in groups.items():
+        assert sorted(membership.get_participants(channel)) == sorted(
+            set(convo.metadata.participants)
+        )
+        assert membership.get_channel_sizes()[channel] == len(
+            set(convo.metadata.participants)
+        )
+
+
+def test_queries(membership):
+    assert sorted(membership.get_channels("Bugs Bunny")) == sorted(
+        membership.get_channels_of_any(["Bugs Bunny", "Nobody"])
+    )
+    assert len(membership.get_channels("Bugs Bunny")) == 2
+    assert membership.get_channels("Nobody") == []
+    assert membership.get_participants("nothing") == []
+
+    assert membership.is_member("Bugs Bunny", "marathon")
+    assert not membership.is_member("Benedek Elek", "marathon")
+    assert not membership.is_member("Nobody", "marathon")
+
+    co_members = membership.get_co_members("Bugs Bunny")
+    assert "Bugs Bunny" not in co_members
+    assert set(membership.get_participants("marathon")) - {
+        "Bugs Bunny"
+    } <= set(co_members)
+
+
+def test_subset(membership):
+    subset = membership.subset(["marathon", "nothing"])
+    assert subset.channels == ["marathon"]
+    assert subset.participants == sorted(
+        membership.get_participants("marathon")
+    )
+    assert subset.get_channels("Bugs Bunny") == ["marathon"]
+
+
+def test_duplicates_are_dropped():
+    membership = ChannelMembership(
+        np.array(["a", "b"], dtype=object),
+        np.array(["x"], dtype=object),
+        np.array([0, 0, 1]),
+        np.array([0, 0, 0]),
+    )
+    assert membership.get_participants("x") == ["a", "b"]
+    assert membership.get_channel_sizes() == {"x": 2}
@@ -0,0 +1,152 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from miner.message.chunked_stats import ChunkedStats, StatsSummary
+from miner.message.conversation_cache import ConversationCache
+from miner.message.conversations import Conversations
+from miner.message.message_store import MessageStore
+from miner.utils import const
+
+
+@pytest.fixture()
+def chunked(conversations, app):
+    def chunks():
+        for convo in conversations.private.values():
+            yield convo.data
+
+    return ChunkedStats(chunks, app._config)
+
+
+def _to_dict(df):
+    return dict(zip(df.unique_values, df.counts))
+
+
+def test_chunked_stats_match_in_memory_stats(chunked, priv_stats):
+    for stat in ("mc", "wc", "cc", "text_mc", "media_mc"):
+        assert getattr(chunked, stat) == getattr(priv_stats, stat)
+    assert chunked.approx_unique_mc == priv_stats.unique_mc
+    assert chunked.start == priv_stats.start
+    assert chunked.end == priv_stats.end
+    assert chunked.channels == sorted(priv_stats.channels)
+    assert chunked.contributors == sorted(priv_stats.contributors)
+    assert _to_dict(chunked.most_used_words) == _to_dict(
+        priv_stats.most_used_words
+    )
+    assert _to_dict(chunked.most_used_msgs) == _to_dict(
+        priv_stats.most_used_msgs
+    )
+
+
+@pytest.mark.parametrize("timeframe", ["y", "m", "d"])
+def test_chunked_time_series_match(chunked, priv_stats, timeframe):
+    pd.testing.assert_frame_equal(
+        chunked.get_grouped_time_series_data(timeframe),
+        priv_stats.get_grouped_time_series_data(timeframe),
+        check_dtype=False,
+    )
+
+
+def test_summaries_are_associative(panalyzer, app):
+    first, second, third = [
+        StatsSummary.from_df(convo.data, app._config)
+        for convo in list(panalyzer.data.values())[:3]
+    ]
+    left = (first + second) + third
+    right = first + (second + third)
+
+    assert left.sums.equals(right.sums)
+    assert left.words == right.words
+    assert (left.start, left.end) == (right.start, right.end)
+
+
+def test_chunk_sources(conversations, app, analyzer, tmp_path, DATA_PATH):
+    cache = ConversationCache(DATA_PATH)
+    from_cache = ChunkedStats(cache.iter_dfs, app._config)
+    assert from_cache.mc == analyzer.private.stats.mc + (
+        analyzer.group.stats.mc
+    )
+
+    store = MessageStore.from_conversations(
+        os.path.join(tmp_path, "messages.sqlite"), conversations, app._config
+    )
+    from_store = ChunkedStats(
+        lambda: store.iter_dfs(chunksize=5, kind="group"), app._config
+    )
+    assert from_store.wc == analyzer.group.stats.wc
+    assert from_store.end == analyzer.group.stats.end
+    store.close()
+
+
+def test_chunks_are_streamed_from_the_export(data_path, app):
+    expected = Conversations(data_path, cache=False)
+
+    chunked = ChunkedStats.from_path(data_path, app._config)
+
+    assert chunked.mc == sum(
+        len(convo.data)
+        for kind in ("private", "group")
+        for convo in getattr(expected, kind).values()
+    )
+    assert chunked.number_of_channels == len(expected.private) + len(
+        expected.group
+    )
+
+
+def test_distinct_messages_are_bounded(app):
+    def chunk(contents):
+        return pd.DataFrame(
+            {
+                "content": contents,
+                "sender_name": "Foo Bar",
+                "partner": "Foo Bar",
+            },
+            index=pd.date_range("2020-01-01", periods=len(contents), tz="UTC"),
+        )
+
+    chunks = [
+        chunk(["hi", "hi", "hi", "a", "b"]),
+        chunk(["hi", "hi", "c", "d", "e"]),
+    ]
+    chunked = ChunkedStats(lambda: iter(chunks), app._config, max_msgs=2)
+
+    assert len(chunked.summary.msgs) <= 2
+    assert chunked.most_used_msgs.unique_values.iloc[0] == "hi"
+    # counts are never overestimated
+    assert chunked.most_used_msgs.counts.iloc[0] <= 5
+
+    exact = ChunkedStats(lambda: iter(chunks), app._config, max_msgs=None)
+    assert exact.approx_unique_mc == 6
+    assert _to_dict(exact.most_used_msgs)["hi"] == 5
+
+
+def test_distinct_messages_are_estimated(app):
+    def chunk(start):
+        contents = [f"message {i}" for i in range(start, start + 2_000)]
+        return pd.DataFrame(
+            {
+                "content": contents + contents[:100],
+                "sender_name": "Foo Bar",
+                "partner": "Foo Bar",
+            },
+            index=pd.date_range("2020-01-01", periods=2_100, tz="UTC"),
+        )
+
+    chunks = [chunk(0), chunk(1_000), chunk(2_000)]
+    chunked = ChunkedStats(lambda: iter(chunks), app._config, max_msgs=500)
+
+    assert len(chunked.summary.msg_hashes) == 500
+    assert chunked.approx_unique_mc == pytest.approx(4_000, rel=0.15)
+
+
+def test_deleted_threads_are_not_read_from_cache(data_path):
+    expected = Conversations(data_path)
+    shutil.rmtree(
+        os.path.join(data_path, *const.MESSAGES_SUBPATH, "marathon_sffsfid76")
+    )
+
+    dfs = list(ConversationCache(data_path).iter_dfs())
+    assert len(dfs) == len(expected.private) + len(expected.group) - 1
+    assert all("marathon" not in df.partner.unique() for df in dfs)
@@ -23,7 +23,7 @@ def test_data_is_df(convo):
 
 
 def test_df_shape(convo):
-    assert convo.data.shape == (5, 4)
+    assert convo.data.shape == (5, 9)
 
 
 def test_data_has_right_length(convo):
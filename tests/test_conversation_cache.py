@@ -0,0 +1,162 @@
+import json
+import os
+
+import pandas as pd
+
+from miner.message.conversation_cache import (
+    CachedConversation,
+    ConversationCache,
+    IncrementalConversation,
+)
+from miner.message.conversations import Conversations
+from miner.utils import const
+
+
+def test_cache_is_written(data_path):
+    Conversations(data_path)
+    cache = ConversationCache(data_path)
+    assert os.path.isfile(cache.index_json)
+    assert len(cache._index) == 7
+
+
+def test_warm_start_reads_from_cache(data_path):
+    cold = Conversations(data_path)
+    warm = Conversations(data_path)
+
+    for kind in ("private", "group"):
+        assert getattr(cold, kind).keys() == getattr(warm, kind).keys()
+        for name, convo in getattr(warm, kind).items():
+            assert isinstance(convo, CachedConversation)
+            expected = getattr(cold, kind).get(name)
+            pd.testing.assert_frame_equal(convo.data, expected.data)
+            assert convo.metadata == expected.metadata
+
+
+def test_changed_thread_is_invalidated(data_path):
+    Conversations(data_path)
+    json = os.path.join(
+        data_path,
+        *const.MESSAGES_SUBPATH,
+        "tokehal_sdf7fs9d876",
+        "message_2.json",
+    )
+    stat = os.stat(json)
+    os.utime(json, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    warm = Conversations(data_path)
+    assert not isinstance(warm.private.get("Tőke Hal"), CachedConversation)
+    assert isinstance(warm.private.get("Foo Bar"), CachedConversation)
+
+
+def test_cache_can_be_disabled(data_path):
+    Conversations(data_path, cache=False)
+    assert not os.path.exists(os.path.join(data_path, *const.CACHE_SUBPATH))
+
+
+def test_new_export_is_imported_incrementally(data_path, copy_data, tmp_path):
+    old = Conversations(data_path)
+    new_path = copy_data(data_path, os.path.join(tmp_path, "new_test_data"))
+    json = os.path.join(
+        new_path,
+        *const.MESSAGES_SUBPATH,
+        "benedekelek_s4f65sdg",
+        "message_1.json",
+    )
+    with open(json) as f:
+        raw = f.read()
+    new_message = (
+        '"messages": [{"sender_name": "Benedek Elek", '
+        '"timestamp_ms": 1600000000000, "content": "back again", '
+        '"type": "Generic"},'
+    )
+    with open(json, "w") as f:
+        f.write(raw.replace('"messages": [', new_message, 1))
+
+    new = Conversations(new_path, previous=data_path)
+
+    updated = new.private.get("Benedek Elek")
+    previous = old.private.get("Benedek Elek")
+    assert isinstance(updated, IncrementalConversation)
+    assert len(updated.data) == len(previous.data) + 1
+    assert updated.data.iloc[-1].content == "back again"
+    assert updated.data.wc.sum() == previous.data.wc.sum() + 2
+    assert updated.metadata == previous.metadata
+    unchanged = new.private.get("Foo Bar")
+    pd.testing.assert_frame_equal(
+        unchanged.data, old.private.get("Foo Bar").data
+    )
+    # the updated threads are cached for the new export as well
+    assert isinstance(
+        Conversations(new_path).private.get("Benedek Elek"),
+        CachedConversation,
+    )
+
+
+def test_multi_part_thread_is_imported_incrementally(
+    data_path, copy_data, tmp_path
+):
+    Conversations(data_path)
+    new_path = copy_data(data_path, os.path.join(tmp_path, "new_test_data"))
+    directory = os.path.join(
+        new_path, *const.MESSAGES_SUBPATH, "tokehal_sdf7fs9d876"
+    )
+    first = os.path.join(directory, "message_1.json")
+    with open(first) as f:
+        raw = json.load(f)
+    raw["participants"].append({"name": "Foo Bar"})
+    raw["messages"].insert(
+        0,
+        {
+            "sender_name": "Foo Bar",
+            "timestamp_ms": 1600000000000,
+            "content": "hello",
+            "type": "Generic",
+        },
+    )
+    with open(first, "w") as f:
+        json.dump(raw, f)
+
+    expected = Conversations(new_path, cache=False).private.get("Tőke Hal")
+    new = Conversations(new_path, previous=data_path)
+    updated = new.private.get("Tőke Hal")
+
+    assert updated.metadata == expected.metadata
+    assert updated.metadata.participants[-1] == "Foo Bar"
+    # categories might be in a different order, their values are the same
+    pd.testing.assert_frame_equal(
+        updated.data, expected.data, check_categorical=False
+    )
+
+    # the order of the parts does not matter
+    second = os.path.join(directory, "message_2.json")
+    reversed_parts = new._update_from_previous(directory, [second, first])
+    assert reversed_parts.metadata == expected.metadata
+    assert reversed_parts.path == first
+
+
+def test_renamed_thread_is_imported_incrementally(
+    data_path, copy_data, tmp_path
+):
+    Conversations(data_path)
+    new_path = copy_data(data_path, os.path.join(tmp_path, "new_test_data"))
+    json_path = os.path.join(
+        new_path,
+        *const.MESSAGES_SUBPATH,
+        "marathon_sffsfid76",
+        "message_1.json",
+    )
+    with open(json_path) as f:
+        raw = json.load(f)
+    raw["title"] = "marathon 2"
+    with open(json_path, "w") as f:
+        json.dump(raw, f)
+
+    expected = Conversations(new_path, cache=False).group.get("marathon 2")
+    updated = Conversations(new_path, previous=data_path).group.get(
+        "marathon 2"
+    )
+    assert isinstance(updated, IncrementalConversation)
+    assert updated.data.partner.unique().tolist() == ["marathon 2"]
+    pd.testing.assert_frame_equal(
+        updated.data, expected.data, check_categorical=False
+    )
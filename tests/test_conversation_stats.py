@@ -1,10 +1,16 @@
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import pytest
+import pytz
 
-from miner.message.conversation_stats import ConversationStats
-from miner.utils import utils
+from miner.message.conversation_stats import (
+    ConversationStats,
+    StatsDataframe,
+    WordCounts,
+)
+from miner.utils import const, utils
 
 
 class TestConversationStatsForGroups:
@@ -14,7 +20,7 @@ class TestConversationStatsForGroups:
         assert isinstance(group_stats.messages, pd.DataFrame)
         assert group_stats.messages.shape == (
             18,
-            6,
+            11,
         )
         assert group_stats.number_of_channels == 3
 
@@ -56,7 +62,7 @@ class TestConversationStatsForGroups:
         assert filtered.cc == 18
         assert filtered.df.shape == (
             1,
-            4,
+            9,
         )
 
     def test_filter_me(self, group_stats):
@@ -64,14 +70,14 @@ class TestConversationStatsForGroups:
         # NOTE filters out the one group where I'm not a contributor,
         # only a participant
         assert filtered.number_of_channels == 2
-        assert filtered.df.shape == (4, 4)
+        assert filtered.df.shape == (4, 9)
         assert filtered.text_mc == 4
         assert filtered.percentage_of_media_messages == 0
 
     def test_filter_partner(self, group_stats):
         filtered = group_stats.filter(senders="partner")
         assert filtered.number_of_channels == 3
-        assert filtered.df.shape == (14, 6)
+        assert filtered.df.shape == (14, 11)
         assert filtered.text_mc == 12
         assert filtered.percentage_of_media_messages == pytest.approx(
             14.28, 0.1
@@ -81,11 +87,29 @@ class TestConversationStatsForGroups:
     def test_filter_subject_by_name(self, group_stats):
         filtered = group_stats.filter(senders="Bugs Bunny")
         assert filtered.number_of_channels == 1
-        assert filtered.df.shape == (1, 4)
+        assert filtered.df.shape == (1, 9)
         assert filtered.text_mc == 1
         assert filtered.percentage_of_media_messages == 0
         assert len(filtered.contributors) == 1
 
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"channels": ["marathon", "Foo Bar, John Doe and Bugs Bunny"]},
+            {"senders": "Foo Bar"},
+            {"senders": "me"},
+            {"senders": "partner"},
+            {"channels": "marathon", "senders": ["Foo Bar", "Jenő Rejtő"]},
+            {"channels": "gibberish"},
+        ],
+    )
+    def test_indexed_filter_matches_full_scan(self, group_stats, kwargs):
+        indexed = group_stats.filter(**kwargs)
+        # passing a copy of the df skips the row index
+        scanned = group_stats.filter(df=group_stats.df.copy(), **kwargs)
+
+        pd.testing.assert_frame_equal(indexed.df, scanned.df)
+
     def test_filter_date(self, group_stats):
         filtered = group_stats.filter(start=utils.dt(y=2018), period="y")
         assert filtered.channels == ["marathon"]
@@ -197,19 +221,19 @@ class TestConversationStatsForPrivate:
         assert filtered.channels == ["Foo Bar"]
         assert filtered.created_by_me is True
         assert filtered.cc == 140
-        assert filtered.df.shape == (15, 10)
+        assert filtered.df.shape == (15, 15)
 
     def test_filter_senders(self, priv_stats):
         filtered = priv_stats.filter(senders="Foo Bar")
         assert filtered.channels == ["Foo Bar"]
         assert not filtered.created_by_me
         assert filtered.cc == 56
-        assert filtered.df.shape == (6, 8)
+        assert filtered.df.shape == (6, 13)
 
     def test_stats_are_in_df(self, panalyzer):
         stats_df = panalyzer.filter(
             participants="Bugs Bunny"
-        )._stats._get_convos_in_numbers()
+        ).stats._get_convos_in_numbers()
 
         assert "mc" in stats_df
         assert "text_mc" in stats_df
@@ -218,12 +242,38 @@ class TestConversationStatsForPrivate:
         assert "cc" in stats_df
 
     def test_stats_index_can_be_grouped(self, panalyzer):
-        stats = panalyzer.filter(participants="Bugs Bunny")._stats
+        stats = panalyzer.filter(participants="Bugs Bunny").stats
         assert stats.df.index[0].year == 2014
         assert stats.df.index[0].month == 9
         assert stats.df.index[0].day == 24
         assert stats.df.index[0].hour == 15
 
+    def test_stats_are_in_configured_time_zone(self, panalyzer):
+        stats = panalyzer.filter(participants="Bugs Bunny").stats
+        config = {**stats.config, "timezone": "Europe/Budapest"}
+        local = ConversationStats(stats.df, config)
+
+        assert str(local.df.index.tz) == "Europe/Budapest"
+        assert local.df.index[0] == stats.df.index[0]
+        assert local.df.index[0].hour == 17
+        hours = local.stats_per_timeframe(timeframe="h")
+        assert hours[17] == stats.stats_per_timeframe(timeframe="h")[15]
+
+    def test_dates_are_filtered_in_configured_time_zone(self, panalyzer):
+        stats = panalyzer.filter(participants="Bugs Bunny").stats
+        config = {**stats.config, "timezone": "America/New_York"}
+        local = ConversationStats(stats.df, config)
+
+        start = pytz.timezone("America/New_York").localize(
+            datetime(2014, 11, 22)
+        )
+        expected = stats.filter(start=start, period="d").df
+        filtered = local.filter(start="2014-11-22", period="d").df
+        assert (filtered.index == expected.index).all()
+        # the message at 01:17 UTC was sent on the 21st in New York
+        utc = stats.filter(start="2014-11-22", period="d").df
+        assert len(filtered) == len(utc) - 1
+
     def test_properties(self, priv_stats):
         percentage_of_media_msgs = priv_stats.percentage_of_media_messages
         assert percentage_of_media_msgs == pytest.approx(29.03, 0.1)
@@ -269,7 +319,7 @@ class TestConversationStatsForPrivate:
         assert reacted_messages.reactions[0][0].get("reaction") == "❤"
 
     def test_get_grouped_time_series_data(self, panalyzer):
-        grouped = panalyzer._stats.get_grouped_time_series_data(timeframe="y")
+        grouped = panalyzer.stats.get_grouped_time_series_data(timeframe="y")
         assert len(grouped) == 3
         third_row = grouped.iloc[2]
         assert third_row.mc == 15
@@ -277,17 +327,17 @@ class TestConversationStatsForPrivate:
         assert third_row.wc == 34
         assert third_row.cc == 140
 
-        grouped = panalyzer._stats.get_grouped_time_series_data(timeframe="m")
+        grouped = panalyzer.stats.get_grouped_time_series_data(timeframe="m")
         assert len(grouped) == 9
 
-        grouped = panalyzer._stats.get_grouped_time_series_data(timeframe="d")
+        grouped = panalyzer.stats.get_grouped_time_series_data(timeframe="d")
         assert len(grouped) == 17
 
-        grouped = panalyzer._stats.get_grouped_time_series_data(timeframe="h")
+        grouped = panalyzer.stats.get_grouped_time_series_data(timeframe="h")
         assert len(grouped) == 24
 
     def test_get_grouped_time_series_data_foo_bar(self, panalyzer):
-        stats = panalyzer.filter(participants="Foo Bar")._stats
+        stats = panalyzer.filter(participants="Foo Bar").stats
         grouped = stats.get_grouped_time_series_data("y")
         assert len(grouped) == 1
         first_row = grouped.iloc[0]
@@ -306,7 +356,7 @@ class TestConversationStatsForPrivate:
         assert len(grouped) == 14
 
     def test_stats_per_period(self, panalyzer):
-        yearly = panalyzer._stats.stats_per_timeframe("y", "mc")
+        yearly = panalyzer.stats.stats_per_timeframe("y", "mc")
         assert yearly == {
             2009: 0,
             2010: 0,
@@ -322,7 +372,7 @@ class TestConversationStatsForPrivate:
             2020: 15,
         }
 
-        monthly = panalyzer._stats.stats_per_timeframe("m", "mc")
+        monthly = panalyzer.stats.stats_per_timeframe("m", "mc")
         assert monthly == {
             "january": 3,
             "february": 10,
@@ -338,7 +388,7 @@ class TestConversationStatsForPrivate:
             "december": 2,
         }
 
-        daily = panalyzer._stats.stats_per_timeframe("d", "mc")
+        daily = panalyzer.stats.stats_per_timeframe("d", "mc")
         assert daily == {
             "monday": 7,
             "tuesday": 1,
@@ -349,7 +399,7 @@ class TestConversationStatsForPrivate:
             "sunday": 5,
         }
 
-        hourly = panalyzer._stats.stats_per_timeframe("h", "mc")
+        hourly = panalyzer.stats.stats_per_timeframe("h", "mc")
         assert hourly == {
             0: 1,
             1: 1,
@@ -378,7 +428,7 @@ class TestConversationStatsForPrivate:
         }
 
     def test_stats_per_period_ifiltered_for_foo_bar(self, panalyzer):
-        stats = panalyzer.filter(participants="Foo Bar")._stats
+        stats = panalyzer.filter(participants="Foo Bar").stats
         yearly = stats.stats_per_timeframe("y", "mc")
         assert yearly == {
             2009: 0,
@@ -448,3 +498,140 @@ class TestConversationStatsForPrivate:
             22: 0,
             23: 1,
         }
+
+
+class TestStatsDataframe:
+    @pytest.fixture()
+    def contents(self):
+        return [
+            "Hello there",
+            np.nan,
+            "",
+            "   ",
+            "  leading and  trailing  ",
+            "multi\nline\ttabbed",
+            "ideographic\u3000space and\xa0nbsp",
+            "Tőke Hal :D",
+            np.nan,
+            "",
+            # a lone surrogate is valid JSON
+            "half an emoji \ud83d",
+        ]
+
+    def test_counts_match_python_split(self, contents):
+        df = pd.DataFrame(
+            {"content": contents},
+            index=pd.date_range("2020-01-01", periods=len(contents)),
+        )
+        stats = StatsDataframe()(df)
+
+        texts = [c if isinstance(c, str) else None for c in contents]
+        assert list(stats.mc) == [1] * len(contents)
+        assert list(stats.text_mc) == [int(t is not None) for t in texts]
+        assert list(stats.media_mc) == [int(t is None) for t in texts]
+        assert list(stats.wc) == [len(t.split()) if t else 0 for t in texts]
+        assert list(stats.cc) == [
+            sum(len(word) for word in t.split()) if t else 0 for t in texts
+        ]
+
+    def test_small_chunks(self, contents):
+        df = pd.DataFrame({"content": contents * 3})
+        expected = StatsDataframe()(df)
+        chunked = StatsDataframe()
+        chunked.CHUNKSIZE = 4
+        pd.testing.assert_frame_equal(chunked(df), expected)
+
+    def test_without_content(self):
+        stats = StatsDataframe()(pd.DataFrame({"photos": [1, 2]}))
+        assert stats.sum().to_dict() == {
+            "mc": 2,
+            "text_mc": 0,
+            "media_mc": 0,
+            "wc": 0,
+            "cc": 0,
+        }
+
+    def test_stats_columns_are_carried_by_conversations(self, group_stats):
+        filtered = group_stats.filter(senders="partner")
+        for stats in (group_stats, filtered):
+            assert all(col in stats.df for col in const.STAT_COLUMNS)
+            pd.testing.assert_frame_equal(
+                stats._stats_df, StatsDataframe()(stats.df)
+            )
+
+
+def test_word_counts():
+    counts = WordCounts(pd.Series(["Yapp yapp  :D", "", "hey\tYAPP"]))
+
+    assert counts.words == ["yapp", "yapp", ":d", "hey", "yapp"]
+    assert counts.counts == {"yapp": 3, ":d": 1, "hey": 1}
+    assert counts.average_length == pytest.approx(17 / 5)
+    assert counts.most_common().iloc[0].tolist() == ["yapp", 3]
+    assert WordCounts(pd.Series([], dtype=object)).average_length == 0
+
+
+def test_word_statistics_share_one_count(group_stats):
+    stats = ConversationStats(group_stats.df, group_stats.config)
+    assert "word_counts" not in stats._memo
+
+    unique_wc = stats.unique_wc
+    word_counts = stats.word_counts
+
+    assert unique_wc == len(set(stats.words))
+    assert stats.most_used_words.counts.sum() == len(stats.words)
+    assert stats.word_counts is word_counts
+
+
+def test_derived_data_is_cached_until_invalidated(group_stats):
+    stats = ConversationStats(group_stats.df, group_stats.config)
+
+    text = stats.text
+    assert stats.text is text
+    assert stats.most_used_msgs is stats.most_used_msgs
+
+    usage = stats.memory_usage()
+    assert set(usage) == {"text", "most_used_msgs"}
+    assert all(size > 0 for size in usage.values())
+
+    words = stats.words
+    reacted = stats.reacted_messages
+    stats.invalidate("text")
+    # everything derived from the text is dropped as well
+    for name in ("text", "most_used_msgs", "word_counts", "words"):
+        assert name not in stats._memo
+    assert stats.reacted_messages is reacted
+    assert stats.text is not text
+    assert stats.words is not words
+
+    stats.invalidate("word_counts")
+    assert "words" not in stats._memo
+    assert "text" in stats._memo
+
+    stats.invalidate()
+    assert not stats.memory_usage()
+
+
+def test_stats_are_counted_again_when_invalidated(group_stats):
+    stats = ConversationStats(group_stats.df.copy(), group_stats.config)
+    mc, wc = stats.mc, stats.wc
+
+    df = stats.df
+    df.iloc[0, df.columns.get_loc("content")] = "one two three four five"
+    df.drop(df.index[-1], inplace=True)
+    assert stats.mc == mc
+
+    stats.invalidate()
+    assert stats.mc == mc - 1
+    assert stats.wc == StatsDataframe()(df).wc.sum()
+    assert stats.wc != wc
+
+
+def test_summary_skips_missing_keys(group_stats):
+    df = group_stats.df.copy()
+    df["sender_name"] = df.sender_name.astype(object)
+    df.iloc[0, df.columns.get_loc("sender_name")] = np.nan
+    stats = ConversationStats(df, group_stats.config)
+
+    summary = stats.get_summary_per(["partner", "sender_name"])
+    assert summary.notna().all().all()
+    assert summary.mc.sum() == stats.mc - 1
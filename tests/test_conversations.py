@@ -1,4 +1,11 @@
+import json
+import os
+
+import pandas as pd
+
 from miner.message.conversation import Conversation
+from miner.message.conversations import Conversations, ConversationsPaths
+from miner.utils import const, utils
 
 
 def test_get(conversations):
@@ -66,3 +73,76 @@ def test_groups_have_more_than_two_participates(conversations):
             for data in conversations.group.values()
         ]
     )
+
+
+def test_parallel_loading_matches_serial(conversations, DATA_PATH):
+    parallel = Conversations(DATA_PATH, cache=False, workers=2)
+    for kind in ("private", "group"):
+        serial_convos = getattr(conversations, kind)
+        parallel_convos = getattr(parallel, kind)
+        assert list(parallel_convos.keys()) == list(serial_convos.keys())
+        for name, convo in parallel_convos.items():
+            pd.testing.assert_frame_equal(
+                convo.data, serial_convos.get(name).data
+            )
+            assert convo.metadata == serial_convos.get(name).metadata
+
+
+def test_paths_cache_is_rebuilt_when_stale(data_path):
+    directories = ConversationsPaths(data_path, "group").directories
+    assert len(directories) == 3
+
+    json = os.path.join(
+        data_path,
+        *const.MESSAGES_SUBPATH,
+        "tokehal_sdf7fs9d876",
+        "message_1.json",
+    )
+    with open(json) as f:
+        raw = f.read()
+    with open(json, "w") as f:
+        f.write(raw.replace('"Regular"', '"RegularGroup"'))
+    stat = os.stat(json)
+    os.utime(json, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    paths = ConversationsPaths(data_path, "group")
+    assert len(paths.directories) == 4
+    assert os.path.dirname(json) in paths.directories
+    assert utils.read_json(paths.paths_json).get("version") == paths.VERSION
+
+
+def test_legacy_paths_cache_is_replaced(data_path):
+    paths_json = os.path.join(
+        data_path, *const.MESSAGES_SUBPATH, "private_messages.json"
+    )
+    utils.dump_to_json(paths_json, ["/some/stale/directory"])
+
+    directories = ConversationsPaths(data_path, "private").directories
+
+    assert len(directories) == 4
+    assert all(d.startswith(data_path) for d in directories)
+
+
+def test_thread_parts_are_merged_once(data_path):
+    directory = os.path.join(
+        data_path, *const.MESSAGES_SUBPATH, "tokehal_sdf7fs9d876"
+    )
+    jsons = [os.path.join(directory, f"message_{i}.json") for i in (2, 1)]
+    with open(jsons[0]) as f:
+        raw = json.load(f)
+    raw["participants"].append({"name": "Foo Bar"})
+    with open(jsons[0], "w") as f:
+        json.dump(raw, f)
+
+    convo = Conversations._merge_convo_files_if_needed(jsons)
+    parts = [Conversation(path=json) for json in jsons]
+
+    assert convo.path == jsons[1]
+    assert len(convo.data) == sum(len(part.data) for part in parts)
+    assert convo.data.index.is_monotonic_increasing
+    assert convo.metadata.title == "Tőke Hal"
+    assert convo.metadata.participants == [
+        "Tőke Hal",
+        "Jenő Rejtő",
+        "Foo Bar",
+    ]
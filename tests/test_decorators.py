@@ -1,8 +1,9 @@
 import json
+from datetime import datetime
 
 import pytest
 
-from miner.utils import decorators
+from miner.utils import decorators, utils
 
 
 def test_outputter(sample_df):
@@ -56,3 +57,29 @@ def test_attribute_checker():
 
     with pytest.raises(ValueError):
         decorators.attribute_checker(mock_func)(statistic="gibberish")
+
+
+def test_start_end_period_checker_localizes_in_the_timezone():
+    def mock_func(start=None, end=None, period=None):
+        return start, end
+
+    class Stats:
+        config = {"timezone": "Europe/Budapest"}
+
+        @decorators.start_end_period_checker
+        def get_range(self, start=None, end=None, period=None):
+            return start, end
+
+    checker = decorators.start_end_period_checker(mock_func)
+    start, end = checker(start="2020-02-13", end=datetime(2020, 2, 14))
+    assert start.isoformat() == "2020-02-13T00:00:00+00:00"
+    assert end.isoformat() == "2020-02-14T00:00:00+00:00"
+
+    start, _ = checker(start="2020-02-13", timezone="Europe/Budapest")
+    assert start.isoformat() == "2020-02-13T00:00:00+01:00"
+
+    start, end = Stats().get_range(
+        start="2020-08-13", end=utils.dt(y=2020, m=8, d=14)
+    )
+    assert start.isoformat() == "2020-08-13T00:00:00+02:00"
+    assert end.isoformat() == "2020-08-14T00:00:00+00:00"
@@ -0,0 +1,108 @@
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from miner.app import App
+from miner.message.conversations import Conversations
+from miner.utils import const, filesystem
+
+
+@pytest.fixture()
+def zip_path(DATA_PATH, tmp_path):
+    path = os.path.join(tmp_path, "facebook.zip")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for root, dirs, files in os.walk(DATA_PATH):
+            dirs[:] = [d for d in dirs if d != "cache"]
+            for file in files:
+                if file.endswith("_messages.json"):
+                    continue
+                full_path = os.path.join(root, file)
+                archive.write(full_path, os.path.relpath(full_path, DATA_PATH))
+    return path
+
+
+def test_split(zip_path):
+    archive, member = filesystem.split(
+        os.path.join(zip_path, "friends", "friends.json")
+    )
+    assert archive.path == zip_path
+    assert member == "friends/friends.json"
+
+    archive, member = filesystem.split(zip_path)
+    assert archive.path == zip_path
+    assert member == ""
+
+    assert filesystem.split("/some/export/file.json") == (
+        None,
+        "/some/export/file.json",
+    )
+
+
+def test_exists_and_isfile(zip_path):
+    friends = os.path.join(zip_path, *const.FRIENDS_PATH)
+    assert filesystem.exists(zip_path)
+    assert filesystem.exists(os.path.join(zip_path, "friends"))
+    assert filesystem.exists(friends)
+    assert filesystem.isfile(friends)
+    assert not filesystem.isfile(os.path.join(zip_path, "friends"))
+    assert not filesystem.exists(os.path.join(zip_path, "gibberish"))
+
+
+def test_walk_matches_directory(DATA_PATH, zip_path):
+    def walk(path):
+        return sorted(
+            (os.path.relpath(root, path), sorted(files))
+            for root, _, files in filesystem.walk(path)
+            if "cache" not in root
+        )
+
+    expected = [
+        (root, [f for f in files if not f.endswith("_messages.json")])
+        for root, files in walk(DATA_PATH)
+    ]
+    assert walk(zip_path) == expected
+
+
+def test_read_member(DATA_PATH, zip_path):
+    member = os.path.join(*const.FRIENDS_PATH)
+    with filesystem.open_binary(os.path.join(zip_path, member)) as f:
+        raw = f.read()
+    with open(os.path.join(DATA_PATH, member), "rb") as f:
+        assert raw == f.read()
+    assert filesystem.getsize(os.path.join(zip_path, member)) == len(raw)
+
+
+def test_writable_path(zip_path):
+    cache = os.path.join(zip_path, *const.CACHE_SUBPATH)
+    assert filesystem.get_writable_path(cache) == os.path.join(
+        zip_path[: -len(".zip")], *const.CACHE_SUBPATH
+    )
+    assert filesystem.get_writable_path("/some/path") == "/some/path"
+
+
+def test_app_reads_zip_without_extracting(app, conversations, zip_path):
+    zip_app = App(path=zip_path)
+
+    assert zip_app.profile_information.name == app.profile_information.name
+    pd.testing.assert_frame_equal(zip_app.friends.data, app.friends.data)
+
+    zip_convos = Conversations(zip_path)
+    for kind in ("private", "group"):
+        expected = getattr(conversations, kind)
+        convos = getattr(zip_convos, kind)
+        assert sorted(convos.keys()) == sorted(expected.keys())
+        for name, convo in convos.items():
+            pd.testing.assert_frame_equal(convo.data, expected.get(name).data)
+
+    # only the caches are written, next to the archive
+    written = os.path.dirname(zip_path)
+    assert sorted(os.listdir(written)) == ["facebook", "facebook.zip"]
+    assert os.listdir(os.path.join(written, "facebook")) == ["messages"]
+
+    # and they are read back the next time
+    cached = Conversations(zip_path)
+    assert sorted(cached.private.keys()) == sorted(
+        conversations.private.keys()
+    )
@@ -4,7 +4,7 @@ from miner.utils.utils import dt
 
 class TestGroupStatisticsWithFiltering:
     def test_stats_marathon(self, ganalyzer):
-        stats = ganalyzer.filter(channels="marathon")._stats
+        stats = ganalyzer.filter(channels="marathon").stats
 
         assert isinstance(stats, ConversationStats)
 
@@ -20,7 +20,7 @@ class TestGroupStatisticsWithFiltering:
     def test_stats_biggest_group_filtered(self, ganalyzer):
         group_stats = ganalyzer.filter(
             channels="Tőke Hal, Foo Bar, Donald Duck and 2 others"
-        )._stats
+        ).stats
 
         filtered_stats_me = group_stats.filter(senders="me")
         assert filtered_stats_me.mc == 0
@@ -0,0 +1,61 @@
+import functools
+
+import pandas as pd
+import pytest
+
+from miner.message.conversation import Conversation
+from miner.utils import utils
+from miner.utils.json_stream import FacebookJSONStream, read_json_in_chunks
+
+
+@pytest.fixture(scope="module")
+def jsons(DATA_PATH):
+    return list(
+        utils.walk_directory_and_search(
+            DATA_PATH, utils.get_all_jsons, ".json", "message_"
+        )
+    )
+
+
+def assert_same_as_read_at_once(data, json_path):
+    expected = utils.read_facebook_json(json_path)
+    messages = expected.pop("messages")
+    pd.testing.assert_frame_equal(data.pop("messages"), pd.DataFrame(messages))
+    assert data == expected
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 10_000])
+def test_read_json_in_chunks(jsons, chunksize):
+    for json_path in jsons:
+        data = read_json_in_chunks(json_path, chunksize=chunksize)
+        assert_same_as_read_at_once(data, json_path)
+
+
+@pytest.mark.parametrize("blocksize", [1, 5, 7, 64])
+def test_stream_with_small_blocks(jsons, blocksize):
+    for json_path in jsons:
+        stream = FacebookJSONStream(json_path, blocksize=blocksize)
+        data = stream.read_object("messages", chunksize=3)
+        assert_same_as_read_at_once(data, json_path)
+
+
+def test_split_incomplete_escape():
+    data, carry = FacebookJSONStream._split_incomplete_escape(b'"ab\\u00')
+    assert (data, carry) == (b'"ab', b"\\u00")
+
+    data, carry = FacebookJSONStream._split_incomplete_escape(b'"a\\\\\\\\')
+    assert (data, carry) == (b'"a', b"\\\\\\\\")
+
+    data, carry = FacebookJSONStream._split_incomplete_escape(b'"abcdef"')
+    assert (data, carry) == (b'"abcdef"', b"")
+
+
+def test_conversation_with_streaming_reader(jsons):
+    for json_path in jsons:
+        expected = Conversation(path=json_path)
+        convo = Conversation(
+            path=json_path,
+            reader=functools.partial(read_json_in_chunks, chunksize=2),
+        )
+        pd.testing.assert_frame_equal(convo.data, expected.data)
+        assert convo.metadata == expected.metadata
@@ -0,0 +1,64 @@
+import os
+
+from miner.message import language_detector
+from miner.message.language_detector import LanguageDetector
+
+TEXTS = [
+    "are you the real Bugs Bunny?",
+    "marathon?",
+    "are you the real Bugs Bunny?",
+    "A magyar szavak felismereset probalom tesztelni ezzekkel a mondatokkal.",
+]
+
+
+def test_every_distinct_text_is_detected_once(monkeypatch):
+    detected = []
+
+    def detect_language(text):
+        detected.append(text)
+        return {"lang": "English", "confidence": 100.0}
+
+    monkeypatch.setattr(language_detector, "detect_language", detect_language)
+    detector = LanguageDetector()
+
+    languages = detector.detect(TEXTS)
+    detector.detect(TEXTS[:2])
+
+    assert len(languages) == 3
+    assert sorted(detected) == sorted(set(TEXTS))
+
+
+def test_results_are_persisted(tmp_path, monkeypatch):
+    cache_path = os.path.join(tmp_path, "cache", "languages.jsonl")
+    languages = LanguageDetector(cache_path=cache_path).detect(TEXTS)
+    assert languages[TEXTS[0]].get("lang") == "English"
+    assert os.path.isfile(cache_path)
+
+    def fail(text):
+        raise AssertionError(f"`{text}` should have been read from the cache")
+
+    monkeypatch.setattr(language_detector, "detect_language", fail)
+    detector = LanguageDetector(cache_path=cache_path)
+    # the cache is only read when it is needed
+    assert detector._cache is None
+    assert len(detector) == 3
+    assert detector.detect(TEXTS) == languages
+
+
+def test_parallel_detection_matches_serial():
+    serial = LanguageDetector().detect(TEXTS)
+    parallel = LanguageDetector(workers=2, chunksize=1).detect(TEXTS)
+    assert parallel == serial
+
+
+def test_only_new_results_are_appended(tmp_path):
+    cache_path = os.path.join(tmp_path, "languages.jsonl")
+    detector = LanguageDetector(cache_path=cache_path)
+
+    detector.detect(TEXTS[:2])
+    with open(cache_path) as f:
+        assert len(f.readlines()) == 2
+    detector.detect(TEXTS)
+    detector.detect(TEXTS)
+    with open(cache_path) as f:
+        assert len(f.readlines()) == 3
@@ -0,0 +1,187 @@
+import os
+import shutil
+
+import pytest
+
+from miner.message.conversations import Conversations
+from miner.message.message_store import MessageStore
+from miner.message.messaging_analyzer import MessagingAnalyzerManager
+from miner.utils import const
+
+
+@pytest.fixture()
+def store(conversations, app, tmp_path):
+    store = MessageStore.from_conversations(
+        os.path.join(tmp_path, "messages.sqlite"), conversations, app._config
+    )
+    yield store
+    store.close()
+
+
+def test_all_messages_are_ingested(store, panalyzer, ganalyzer):
+    assert len(store) == len(panalyzer.df) + len(ganalyzer.df)
+    assert store.get_stat_count("mc", kind="private") == panalyzer.stats.mc
+    assert store.get_stat_count("wc", kind="group") == ganalyzer.stats.wc
+
+
+def test_ingesting_again_replaces_the_messages(store, conversations):
+    size = len(store)
+    store.ingest(conversations.private.values(), kind="private")
+    assert len(store) == size
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"channels": "Foo Bar"},
+        {"senders": "me"},
+        {"senders": "partner"},
+        {"channels": ["Foo Bar", "Tőke Hal"], "senders": "Foo Bar"},
+        {"start": "2014-01-01", "end": "2014-12-31"},
+        {"start": "2014-01-01", "period": "y"},
+    ],
+)
+def test_filters_are_pushed_down(store, priv_stats, kwargs):
+    expected = priv_stats.filter(**kwargs)
+
+    stats = store.get_stats(kind="private", **kwargs)
+
+    assert len(stats) == len(expected)
+    assert stats.df.index.equals(expected.df.index)
+    assert stats.wc == expected.wc
+    assert store.get_stat_count("cc", kind="private", **kwargs) == (
+        expected.cc
+    )
+
+
+def test_aggregations_are_pushed_down(store, ganalyzer):
+    ranking = ganalyzer.get_ranking_of_people_by_convo_stats(
+        statistic="mc", top=None
+    )
+    stat_per_sender = store.get_stat_per("sender_name", "mc", kind="group")
+
+    assert stat_per_sender == {
+        name: count for name, count in ranking.get("count").items() if count
+    }
+    with pytest.raises(ValueError):
+        store.get_stat_per("content", "mc")
+
+
+@pytest.fixture()
+def path_store(data_path, app, tmp_path):
+    store = MessageStore.from_path(
+        os.path.join(tmp_path, "export.sqlite"), data_path, app._config
+    )
+    yield store, data_path
+    store.close()
+
+
+def test_export_is_ingested_thread_by_thread(path_store, store):
+    path_store, data_path = path_store
+    assert len(path_store) == len(store)
+    for kind in ("private", "group"):
+        assert path_store.get_stat_per(
+            "partner", "wc", kind=kind
+        ) == store.get_stat_per("partner", "wc", kind=kind)
+
+    # unchanged threads are skipped, changed ones are replaced
+    json = os.path.join(
+        data_path,
+        *const.MESSAGES_SUBPATH,
+        "foobar_n5fd6gG50h",
+        "message_1.json",
+    )
+    with open(json) as f:
+        raw = f.read()
+    with open(json, "w") as f:
+        f.write(
+            raw.replace(
+                '"messages": [',
+                '"messages": [{"sender_name": "Foo Bar", '
+                '"timestamp_ms": 1600000000000, "content": "hi", '
+                '"type": "Generic"},',
+                1,
+            )
+        )
+    path_store.ingest_export(data_path)
+    assert len(path_store) == len(store) + 1
+
+
+def test_cached_threads_are_not_parsed_again(data_path, app, monkeypatch):
+    Conversations(data_path)
+
+    def fail(jsons):
+        raise AssertionError(f"{jsons} should have been read from the cache")
+
+    monkeypatch.setattr(Conversations, "read_thread", staticmethod(fail))
+    store = MessageStore.from_path(
+        os.path.join(data_path, "export.sqlite"), data_path, app._config
+    )
+    assert len(store) == app.analyzer.private.stats.mc + (
+        app.analyzer.group.stats.mc
+    )
+    store.close()
+
+
+def test_threads_with_the_same_title_are_kept_apart(path_store, store):
+    path_store, data_path = path_store
+    inbox = os.path.join(data_path, *const.MESSAGES_SUBPATH)
+    shutil.copytree(
+        os.path.join(inbox, "benedekelek_s4f65sdg"),
+        os.path.join(inbox, "benedekelek_a1b2c3d4"),
+    )
+    thread_mc = store.get_stat_count("mc", channels="Benedek Elek")
+
+    path_store.ingest_export(data_path)
+    assert len(path_store) == len(store) + thread_mc
+    # the copy is not deleted when the original one is ingested again
+    path_store.ingest(
+        [
+            Conversations.read_thread(
+                [os.path.join(inbox, "benedekelek_s4f65sdg", "message_1.json")]
+            )
+        ]
+    )
+    assert path_store.get_stat_count("mc", channels="Benedek Elek") == (
+        2 * thread_mc
+    )
+
+
+@pytest.mark.parametrize("timezone", ["UTC", "Europe/Budapest"])
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"channels": "Foo Bar"},
+        {"senders": "me", "start": "2014-01-01", "period": "y"},
+    ],
+)
+def test_analyzer_queries_use_the_store(
+    store, conversations, app, timezone, kwargs
+):
+    config = {**app._config, "timezone": timezone}
+    in_memory = MessagingAnalyzerManager(conversations, config)
+    backed = MessagingAnalyzerManager(
+        conversations, {**config, "message_store": store}
+    )
+    for kind in ("private", "group"):
+        expected = getattr(in_memory, kind)
+        analyzer = getattr(backed, kind)
+        assert analyzer.get_stat_count("wc", **kwargs) == (
+            expected.get_stat_count("wc", **kwargs)
+        )
+        for timeframe in ("y", "h"):
+            assert analyzer.get_stats_per_timeframe(
+                timeframe, "mc", **kwargs
+            ) == expected.get_stats_per_timeframe(timeframe, "mc", **kwargs)
+        assert analyzer.get_ranking_of_people_by_convo_stats(
+            "wc"
+        ) == expected.get_ranking_of_people_by_convo_stats("wc")
+        # none of these need the messages in memory
+        assert analyzer._df is None
+
+    filtered = backed.private.filter(channels="Tőke Hal")
+    assert filtered.get_stat_count("mc") == (
+        in_memory.private.filter(channels="Tőke Hal").stats.mc
+    )
+    assert filtered.get_stat_count("mc", channels="Foo Bar") == 0
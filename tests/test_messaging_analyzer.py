@@ -1,3 +1,5 @@
+import warnings
+
 import pytest
 
 from miner.message.conversation_stats import ConversationStats
@@ -31,8 +33,8 @@ class TestMessagingAnalyzerManager:
 
     def test_all_interactions(self, analyzer):
         private, group = analyzer.all_interactions("Bugs Bunny")
-        assert private._stats.channels == ["Bugs Bunny"]
-        assert group._stats.channels == [
+        assert private.stats.channels == ["Bugs Bunny"]
+        assert group.stats.channels == [
             "Foo Bar, John Doe and Bugs Bunny",
             "marathon",
         ]
@@ -59,7 +61,7 @@ class TestMessagingAnalyzerManager:
             "Foo Bar",
         ]
         assert stats.contributors == ["Foo Bar"]
-        assert stats.df.shape == (9, 8)
+        assert stats.df.shape == (9, 13)
 
 
 class TestMessagingAnalyzerMethodsForGroups:
@@ -129,6 +131,38 @@ class TestMessagingAnalyzerMethodsForGroups:
             ]
         )
 
+    def test_filter_selects_rows_of_the_stacked_df(self, ganalyzer):
+        filtered = ganalyzer.filter(participants="Bugs Bunny")
+        stacked = ganalyzer._get_df(filtered.data)
+
+        assert filtered.df.index.equals(stacked.index)
+        assert set(filtered.df.columns) == set(stacked.columns)
+        assert filtered.df.sender_name.tolist() == (
+            stacked.sender_name.tolist()
+        )
+        assert ganalyzer.filter(channels=list(ganalyzer.data)).df is (
+            ganalyzer.df
+        )
+
+    def test_low_cardinality_columns_are_categorical(self, ganalyzer):
+        for column in ("partner", "sender_name", "type"):
+            assert ganalyzer.df[column].dtype == "category"
+        assert set(ganalyzer.df.partner.cat.categories) == set(ganalyzer.data)
+
+    def test_stats_per_channel_are_created_lazily(self, ganalyzer):
+        stats_per_channel = ganalyzer._get_stats_per_channel()
+
+        assert not stats_per_channel._cache
+        assert "marathon" in stats_per_channel
+        assert not stats_per_channel._cache
+
+        stats = stats_per_channel["marathon"]
+
+        assert list(stats_per_channel._cache) == ["marathon"]
+        assert stats_per_channel["marathon"] is stats
+        with pytest.raises(KeyError):
+            stats_per_channel["gibberish"]
+
     def test_get_all_channels_for_one_person(self, ganalyzer):
         list_of_groups = ganalyzer.get_all_channels_for_one_person(
             "Bugs Bunny"
@@ -165,6 +199,39 @@ class TestMessagingAnalyzerMethodsForGroups:
         }
 
 
+@pytest.mark.parametrize(
+    "statistic",
+    [
+        "mc",
+        "text_mc",
+        "media_mc",
+        "wc",
+        "cc",
+        "unique_mc",
+        "number_of_channels",
+        "number_of_contributors",
+        "percentage_of_text_messages",
+    ],
+)
+@pytest.mark.parametrize("kind", ["private", "group"])
+def test_ranking_matches_stats_per_people(analyzer, kind, statistic):
+    messaging_analyzer = getattr(analyzer, kind)
+    stats_per_people = messaging_analyzer._get_stats_per_people()
+    expected = {}
+    for name, stats in stats_per_people.items():
+        try:
+            expected[name] = getattr(stats, statistic)
+        except ZeroDivisionError:
+            # someone without messages
+            expected[name] = 0
+
+    ranking = messaging_analyzer.get_ranking_of_people_by_convo_stats(
+        statistic=statistic, top=None
+    )
+
+    assert ranking.get("count") == pytest.approx(expected)
+
+
 class TestMessagingAnalyzerMethodsForPrivates:
     def test_filter_by_participants(self, panalyzer):
         filtered = panalyzer.filter(participants=["Bugs Bunny"])
@@ -248,3 +315,37 @@ class TestMessagingAnalyzerMethodsForPrivates:
             "Bugs Bunny": 6,
             "Benedek Elek": 3,
         }
+
+
+@pytest.mark.parametrize("kind", ["private", "group"])
+def test_summaries_match_stats(analyzer, kind):
+    messaging_analyzer = getattr(analyzer, kind)
+    summary = messaging_analyzer.channel_summary
+    assert list(summary.index) == list(messaging_analyzer.data.keys())
+    for channel, stats in messaging_analyzer.stats_per_channel.items():
+        row = summary.loc[channel]
+        assert row["first"] == stats.start
+        assert row["last"] == stats.end
+        assert row.first_sender == stats.creator
+        assert row.mc == stats.mc
+        assert row.wc == stats.wc
+        assert row.participants == len(
+            set(messaging_analyzer.data[channel].metadata.participants)
+        )
+
+    senders = messaging_analyzer.sender_summary
+    for (channel, sender), row in senders.iterrows():
+        stats = messaging_analyzer.stats.filter(
+            channels=channel, senders=sender
+        )
+        assert row["first"] == stats.start
+        assert row["last"] == stats.end
+        assert row.mc == stats.mc
+    assert senders.mc.sum() == messaging_analyzer.stats.mc
+
+
+def test_summary_of_empty_analyzer(panalyzer):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        summary = panalyzer.filter(channels="Nobody").channel_summary
+    assert not len(summary)
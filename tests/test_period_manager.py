@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from miner.utils import const
+from miner.utils.period_manager import PERIOD_MANAGER
+
+
+@pytest.fixture()
+def dates():
+    return pd.date_range(
+        "2019-12-30 22:00", periods=80, freq="53min", tz="UTC"
+    )
+
+
+@pytest.mark.parametrize("timeframe", ["y", "m", "d", "h"])
+def test_set_df_indices_to_datetime(dates, timeframe):
+    df = pd.DataFrame({"mc": 1}, index=dates)
+    grouped = df.groupby(
+        PERIOD_MANAGER.get_grouping_rules(timeframe, df)
+    ).sum()
+    expected = [
+        PERIOD_MANAGER.ordinal_to_datetime(timeframe, index)
+        for index in grouped.index
+    ]
+
+    result = PERIOD_MANAGER.set_df_indices_to_datetime(grouped, timeframe)
+
+    assert list(result.index) == expected
+    assert result.index.name == "timestamp"
+    assert result.mc.sum() == len(dates)
+
+
+@pytest.mark.parametrize("period", ["y", "m", "d", "h"])
+def test_dates_to_periods(dates, period):
+    periods = PERIOD_MANAGER.dates_to_periods(dates, period)
+    assert list(periods) == [
+        PERIOD_MANAGER.date_to_period(date, period) for date in dates
+    ]
+    if period == "m":
+        assert set(periods) == set(const.MONTHS[-1:] + const.MONTHS[:1])
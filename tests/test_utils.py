@@ -2,11 +2,12 @@ import json
 import os
 import tempfile
 
+import pandas as pd
 import pytest
 import pytz
 from helpers import lower_string, add_string, split_string, tempfile_tree
 
-from miner.utils import utils, command
+from miner.utils import command, const, utils
 
 
 @pytest.fixture(scope="session")
@@ -60,6 +61,27 @@ class TestUtils:
         )
         assert expected_date == with_tz
 
+    def test_ts_to_datetime_index(self, tz_name):
+        dates = [1454607689000, 1598046630000]
+        index = utils.ts_to_datetime_index(dates, unit="ms")
+        assert list(index) == [
+            utils.ts_to_date(date, pytz.timezone(tz_name)) for date in dates
+        ]
+        seconds = utils.ts_to_datetime_index([1454607689, 1598046630])
+        assert seconds.equals(index)
+
+    def test_convert_tz(self, sample_df):
+        df = pd.DataFrame(
+            {"mc": [1, 1]},
+            index=utils.ts_to_datetime_index([1454607689, 1598046630]),
+        )
+        assert utils.convert_tz(df, None) is df
+        assert utils.convert_tz(df, "UTC") is df
+        converted = utils.convert_tz(df, "America/New_York")
+        assert list(converted.index.hour) == [12, 17]
+        assert list(converted.index) == list(df.index)
+        assert utils.convert_tz(sample_df, "UTC") is sample_df
+
     # THIS DOES NOT WORK ON WINDOWS
     def test_walk_directory_and_search_jsons(self, tempfiles):
         jsons_found = utils.walk_directory_and_search(
@@ -145,6 +167,57 @@ class TestUtils:
         res = utils.remove_items_where_value_is_falsible({1: 0, 2: 1, 3: 2})
         assert res == {2: 1, 3: 2}
 
+    def test_read_facebook_json_matches_decode_data(self, DATA_PATH):
+        jsons = list(
+            utils.walk_directory_and_search(
+                DATA_PATH, utils.get_all_jsons, ".json", "message_"
+            )
+        )
+        jsons += [
+            os.path.join(DATA_PATH, *const.FRIENDS_PATH),
+            os.path.join(DATA_PATH, *const.PROFILE_INFORMATION_PATH),
+        ]
+        for json_path in jsons:
+            expected = utils.decode_data(
+                utils.read_json(json_path), utils.utf8_decoder
+            )
+            assert utils.read_facebook_json(json_path) == expected
+
+    def test_loads_facebook_json_edge_cases(self):
+        raw = (
+            b'{"content": "T\\u00c5\\u0091ke \\\\u00e9 \\u00C3\\u00A9",'
+            b' "count": 1, "quote": "\\"\\u0041\\\\"}'
+        )
+        expected = utils.decode_data(json.loads(raw), utils.utf8_decoder)
+        assert utils.loads_facebook_json(raw) == expected
+        assert expected["content"] == "T\u0151ke \\u00e9 \u00e9"
+
+    def test_loads_facebook_json_falls_back_on_invalid_utf8(self):
+        raw = b'{"content": "\\u00c5"}'
+        assert utils.loads_facebook_json(raw) == {"content": "\u00c5"}
+
+    def test_read_thread_type(self, DATA_PATH, monkeypatch, tmp_path):
+        json = os.path.join(
+            DATA_PATH,
+            *const.MESSAGES_SUBPATH,
+            "marathon_sffsfid76",
+            "message_1.json",
+        )
+        assert utils.read_thread_type(json) == "RegularGroup"
+
+        # the key is in neither of the blocks, so the whole file is parsed
+        monkeypatch.setattr(const, "THREAD_TYPE_BLOCKSIZE", 8)
+        assert utils.read_thread_type(json) == "RegularGroup"
+
+        escaped = os.path.join(tmp_path, "message_1.json")
+        with open(escaped, "w") as f:
+            f.write(
+                '{"messages": [{"content": "\\"thread_type\\": \\"x\\""}],'
+                ' "thread_type": "Regular"}'
+            )
+        monkeypatch.setattr(const, "THREAD_TYPE_BLOCKSIZE", 4096)
+        assert utils.read_thread_type(escaped) == "Regular"
+
     def test_generate_date_series(self):
         res = utils.generate_date_series(utils.dt(2010, 10, 10))
         expected = [utils.dt(i, 2, 4) for i in range(2004, 2021)]
@@ -153,7 +226,28 @@ class TestUtils:
 
 class TestDataFrameUtils:
     def test_stack_dfs(self):
-        pass
+        first = pd.DataFrame(
+            {"partner": pd.Categorical(["a", "a"]), "mc": [1, 1]},
+            index=[0, 2],
+        )
+        second = pd.DataFrame(
+            {
+                "partner": pd.Categorical(["b"]),
+                "is_unsent": pd.Categorical([True]),
+                "mc": [1],
+            },
+            index=[1],
+        )
+
+        stacked = utils.stack_dfs(first, second)
+
+        assert stacked.partner.dtype == "category"
+        assert stacked.partner.tolist() == ["a", "b", "a"]
+        assert stacked.is_unsent.dtype == "category"
+        assert stacked.is_unsent.isna().tolist() == [True, False, True]
+        # the inputs are left untouched
+        assert first.partner.cat.categories.tolist() == ["a"]
+        assert "is_unsent" not in first
 
     def test_filter_by_date(self, friends, tz_name):
         df = friends.data
@@ -170,6 +264,15 @@ class TestDataFrameUtils:
         )
         assert len(filtered) == 3
 
+    def test_get_row_index_and_lookup_rows(self):
+        column = pd.Series(["b", "a", None, "b", "c", "a"])
+        index = utils.get_row_index(column)
+
+        assert sorted(index) == ["a", "b", "c"]
+        assert index["b"].tolist() == [0, 3]
+        assert utils.lookup_rows(index, ["c", "a"]).tolist() == [1, 4, 5]
+        assert utils.lookup_rows(index, ["gibberish"]).tolist() == []
+
     def test_df_to_str(self, sample_df):
         res = utils.df_to_str("csv", sample_df)
         assert isinstance(res, str)